@@ -0,0 +1,82 @@
+"""Run the benchmark suite.
+
+Run it from the root of the repo:
+
+    python -m benchmarks
+    python -m benchmarks --output results.json
+    python -m benchmarks --baseline benchmarks/baseline.json
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+
+The results are printed as JSON. If a baseline is passed, the exit
+code is 1 if any scenario is slower than the baseline by more than
+the tolerance, so that it can be used to gate upgrades. The exit code
+is also 1 if `import simber` takes longer than the import budget. The baseline
+depends on the machine, so it should be saved on the machine that
+the suite is run on.
+"""
+
+import json
+import sys
+from argparse import ArgumentParser
+
+from benchmarks.suite import IMPORT_BUDGET_US, SCENARIOS, compare, run
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("scenarios", nargs="*",
+                        help="Scenarios to run, all of them by default")
+    parser.add_argument("--records", type=int, default=20000,
+                        help="Number of records per run")
+    parser.add_argument("--output", help="File to write the results to")
+    parser.add_argument("--baseline", help="Baseline to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slow down compared to the baseline")
+    parser.add_argument("--save-baseline",
+                        help="File to save the results as the baseline")
+    parser.add_argument("--import-budget", type=int,
+                        default=IMPORT_BUDGET_US,
+                        help="Maximum time in us for import simber")
+    args = parser.parse_args()
+
+    names = [scenario.name for scenario in SCENARIOS] + ["import"]
+    unknown = [name for name in args.scenarios if name not in names]
+    if unknown:
+        parser.error("unknown scenarios: {}, choose from {}".format(
+            ", ".join(unknown), ", ".join(names)))
+
+    results = run(args.records, args.scenarios or None, args.import_budget)
+    output = json.dumps(results, indent=2, sort_keys=True)
+
+    print(output)
+
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(output + "\n")
+
+    failed = False
+
+    if "import" in results and \
+            results["import"]["us"] > args.import_budget:
+        print("import: {} us, budget {} us".format(
+            results["import"]["us"], args.import_budget), file=sys.stderr)
+        failed = True
+
+    if args.baseline is None:
+        return 1 if failed else 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance)
+
+    for name, expected, current in regressions:
+        print("{}: {:.0f} ns/record, baseline {:.0f} ns/record".format(
+            name, current, expected), file=sys.stderr)
+
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
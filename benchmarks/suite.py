@@ -0,0 +1,325 @@
+"""Scenarios that measure the write path of the logger end to end.
+
+Every scenario sets up its own logger that does not propagate to
+the shared streams, so the scenarios do not affect each other. The
+console is replaced by /dev/null while a scenario runs and the files
+are written to a tmpfs directory if one is available.
+
+The time taken by `import simber` is measured in a fresh interpreter
+and checked against `IMPORT_BUDGET_US`.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from threading import Thread
+from time import perf_counter
+
+from simber import Logger, get_logger
+from simber.context import bind_context, reset_context
+from simber.stream import OutputStream
+
+
+PLAIN_FORMAT = "[{levelname}] [{logger}]"
+COLOR_FORMAT = "%a[{levelname}]% [{logger}]"
+CONTEXT_FORMAT = "[{levelname}] [{logger}] [{tenant}] [{request_id}]"
+CALLER_FORMAT = "[{levelname}] [{logger}] {filename}:{lineno}"
+
+# Maximum time in us that `import simber` should take
+IMPORT_BUDGET_US = 50000
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _tmpfs_dir() -> str:
+    """Get a directory in memory to write the files to, falls back
+    to the temporary directory."""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+
+    return tempfile.gettempdir()
+
+
+@contextmanager
+def _quiet_console():
+    """Send everything written to the console to /dev/null."""
+    previous = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = previous
+
+
+class Scenario(object):
+    """One case to measure.
+
+    name:       Name of the scenario in the results.
+    setup:      Function that takes the directory to write the files
+                to and returns the function to call per record and the
+                streams to close after. If the function has a
+                `teardown` attribute, it is called once the scenario
+                is over.
+    threads:    Number of threads calling the function at once.
+    """
+
+    def __init__(self, name: str, setup, threads: int = 1):
+        self.name = name
+        self.setup = setup
+        self.threads = threads
+
+
+def _make_logger(name, *streams, level="INFO"):
+    """Build a logger that only writes to the passed streams."""
+    logger = Logger(name, level=level, propagate=False)
+
+    for stream in streams:
+        logger.add_stream(stream, shared=False)
+
+    return logger
+
+
+def _console(format=PLAIN_FORMAT, colors=None):
+    # The name of the stream decides if it is treated as the console,
+    # the records are then printed to sys.stdout which is /dev/null.
+    return OutputStream(sys.__stdout__, format=format, colors=colors)
+
+
+def _file(directory, format=PLAIN_FORMAT):
+    path = os.path.join(directory, "simber-bench-{}.log".format(os.getpid()))
+    return OutputStream(open(path, "w"), format=format)
+
+
+def _devnull(format=PLAIN_FORMAT):
+    return OutputStream(open(os.devnull, "w"), format=format)
+
+
+def _filtered(directory):
+    stream = _devnull()
+    return _make_logger("bench.filtered", stream).debug, [stream]
+
+
+def _console_only(directory):
+    stream = _console()
+    return _make_logger("bench.console", stream).info, [stream]
+
+
+def _devnull_only(directory):
+    stream = _devnull()
+    return _make_logger("bench.devnull", stream).info, [stream]
+
+
+def _file_only(directory):
+    stream = _file(directory)
+    return _make_logger("bench.file", stream).info, [stream]
+
+
+def _console_and_file(directory):
+    streams = [_console(), _file(directory)]
+    return _make_logger("bench.console_file", *streams).info, streams
+
+
+def _caller(directory):
+    """Log with a format that shows the caller, so that it is looked
+    up for every record."""
+    stream = _devnull(CALLER_FORMAT)
+    return _make_logger("bench.caller", stream).info, [stream]
+
+
+def _colored(directory):
+    stream = _console(COLOR_FORMAT, colors=True)
+    return _make_logger("bench.colored", stream).info, [stream]
+
+
+def _context(directory):
+    """Log through a bound logger while fields are bound to the
+    context, the way a request handler would."""
+    stream = _devnull(CONTEXT_FORMAT)
+    bound = _make_logger("bench.context", stream).bind(tenant="acme")
+    token = bind_context(request_id="0f8fad5b")
+
+    def log(message):
+        bound.info(message)
+
+    # Unbind the fields once the scenario is over
+    log.teardown = lambda: reset_context(token)
+    return log, [stream]
+
+
+def _threads(directory):
+    stream = _file(directory)
+    return _make_logger("bench.threads", stream).info, [stream]
+
+
+def _many_loggers(directory):
+    """Log through a hundred loggers below one parent that owns
+    the stream."""
+    stream = _file(directory)
+    parent = _make_logger("bench.many", stream)
+    loggers = [get_logger("bench.many.{}".format(index))
+               for index in range(100)]
+    methods = [logger.info for logger in loggers]
+    state = {"index": 0}
+
+    def log(message):
+        index = state["index"]
+        state["index"] = index + 1
+        methods[index % 100](message)
+
+    # Keep the parent and the children alive while logging
+    log.loggers = (parent, loggers)
+    return log, [stream]
+
+
+SCENARIOS = [
+    Scenario("filtered_debug", _filtered),
+    Scenario("devnull", _devnull_only),
+    Scenario("console", _console_only),
+    Scenario("file", _file_only),
+    Scenario("console_file", _console_and_file),
+    Scenario("console_colored", _colored),
+    Scenario("caller", _caller),
+    Scenario("context", _context),
+    Scenario("threads_8", _threads, threads=8),
+    Scenario("many_loggers", _many_loggers),
+]
+
+
+def _time(log, records: int, threads: int) -> float:
+    """Get the time in ns per record."""
+    if threads == 1:
+        start = perf_counter()
+        for _ in range(records):
+            log("Just a test message")
+        return (perf_counter() - start) / records * 1e9
+
+    per_thread = records // threads
+
+    def work():
+        for _ in range(per_thread):
+            log("Just a test message")
+
+    workers = [Thread(target=work) for _ in range(threads)]
+    start = perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return (perf_counter() - start) / (per_thread * threads) * 1e9
+
+
+def _allocated(log, records: int) -> float:
+    """Get the peak bytes allocated per record."""
+    tracemalloc.start()
+    peak = 0
+
+    for _ in range(records):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        log("Just a test message")
+        peak += tracemalloc.get_traced_memory()[1] - current
+
+    tracemalloc.stop()
+    return peak / records
+
+
+def run_scenario(scenario: Scenario, records: int, repeat: int = 3) -> dict:
+    """Run the scenario and get its results.
+
+    The time is the best of `repeat` runs so that noise from the
+    machine affects it as little as possible.
+    """
+    with _quiet_console():
+        log, streams = scenario.setup(_tmpfs_dir())
+
+        try:
+            # Warm up the caches before measuring
+            for _ in range(min(records, 1000)):
+                log("Just a test message")
+
+            elapsed = min(_time(log, records, scenario.threads)
+                          for _ in range(repeat))
+            allocated = _allocated(log, max(records // 10, 1))
+        finally:
+            teardown = getattr(log, "teardown", None)
+            if teardown is not None:
+                teardown()
+
+            for stream in streams:
+                stream.close()
+
+                if stream.stream_name not in (os.devnull, "<stdout>"):
+                    stream.stream.close()
+                    os.remove(stream.stream_name)
+
+    return {
+        "ns_per_record": round(elapsed, 1),
+        "bytes_per_record": round(allocated, 1),
+        "threads": scenario.threads,
+    }
+
+
+def measure_import(repeat: int = 5, budget: int = IMPORT_BUDGET_US) -> dict:
+    """Get the time taken by `import simber` in us, as reported by
+    `python -X importtime`.
+
+    Every run uses a fresh interpreter and the best run is kept.
+    """
+    best = None
+
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import simber"],
+            cwd=_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True, check=True).stderr
+
+        for line in output.splitlines():
+            parts = line.split("|")
+
+            if len(parts) == 3 and parts[2].strip() == "simber":
+                elapsed = int(parts[1])
+                best = elapsed if best is None else min(best, elapsed)
+
+    return {"us": best, "budget_us": budget}
+
+
+def run(records: int = 20000, names: list = None,
+        import_budget: int = IMPORT_BUDGET_US) -> dict:
+    """Run all the scenarios, or only the named ones. The import
+    is measured under the name `import`."""
+    results = {
+        scenario.name: run_scenario(scenario, records)
+        for scenario in SCENARIOS
+        if names is None or scenario.name in names
+    }
+
+    if names is None or "import" in names:
+        results["import"] = measure_import(budget=import_budget)
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Compare the results with the baseline.
+
+    Returns a list of the scenarios that are slower than the baseline
+    by more than `tolerance`, for eg 0.2 for 20%, along with their
+    baseline and current time.
+    """
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline or "ns_per_record" not in result:
+            continue
+
+        expected = baseline[name]["ns_per_record"]
+        if result["ns_per_record"] > expected * (1 + tolerance):
+            regressions.append((name, expected, result["ns_per_record"]))
+
+    return regressions
@@ -22,7 +22,7 @@ if __name__ == '__main__':
         long_description=long_description,
         long_description_content_type="text/markdown",
         url="https://github.com/deepjyoti30/simber",
-        packages=setuptools.find_packages(),
+        packages=setuptools.find_packages(exclude=("benchmarks",)),
         classifiers=(
             "Programming Language :: Python :: 3",
             "License :: OSI Approved :: MIT License",
@@ -30,5 +30,8 @@ if __name__ == '__main__':
         ),
         python_requires=">=3",
         install_requires=req_pkgs,
+        extras_require={
+            'json': ['orjson']
+        },
         setup_requires=['setuptools'],
     )
@@ -2,7 +2,7 @@
 are to be exposed to the user
 """
 
-from simber.logger import Logger
+from simber.logger import Logger, get_logger
 
 
 __all__ = [
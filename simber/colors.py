@@ -1,14 +1,66 @@
 """Handle formatting related to colors."""
 
-from colorama import Fore
+import os
 
-from re import findall
-from typing import Dict
-
-from simber.configurations import Default
+from simber.levels import LEVEL_COLOR
 from simber.exceptions import InvalidLevel
 
 
+# Built once on first use so that colorama and re are not imported
+# till a format with colors is used.
+_colors = None
+_pattern = None
+_console_initialized = False
+
+
+def _load_colors():
+    """Get the mapping of the color characters to the color codes
+    and the reset code."""
+    global _colors
+
+    if _colors is None:
+        from colorama import Fore
+
+        _colors = ({
+            'g': Fore.GREEN,
+            'r': Fore.RED,
+            'y': Fore.YELLOW,
+            'b': Fore.BLUE,
+            'm': Fore.MAGENTA,
+            'c': Fore.CYAN,
+            'w': Fore.WHITE,
+            'n': Fore.BLACK
+        }, Fore.RESET)
+
+    return _colors
+
+
+def _get_pattern():
+    """Get the pattern that matches the special colored strings,
+    for eg `%gsample_string%`."""
+    global _pattern
+
+    if _pattern is None:
+        from re import compile as compile_pattern
+        _pattern = compile_pattern(r'%.*?%')
+
+    return _pattern
+
+
+def init_console():
+    """Let colorama translate the color codes for the console on
+    Windows. Other platforms understand the codes as they are, so
+    nothing is done."""
+    global _console_initialized
+
+    if os.name != "nt" or _console_initialized:
+        return
+
+    from colorama import init
+    init()
+    _console_initialized = True
+
+
 class ColorFormatter(object):
     """Format colors to the passed string.
 
@@ -25,34 +77,21 @@ class ColorFormatter(object):
     CRITICAL:       Red
     """
 
-    def __init__(self):
-        self._color_mapping = {
-            'g': Fore.GREEN,
-            'r': Fore.RED,
-            'y': Fore.YELLOW,
-            'b': Fore.BLUE,
-            'm': Fore.MAGENTA,
-            'c': Fore.CYAN,
-            'w': Fore.WHITE,
-            'n': Fore.BLACK
-        }
-        self._default = Fore.RESET
-
     @property
-    def color_mapping(self) -> Dict:
-        return self._color_mapping
+    def color_mapping(self) -> dict:
+        return _load_colors()[0]
 
     @property
     def default(self) -> str:
-        return self._default
+        return _load_colors()[1]
 
     def _determine_color_from_level(self, level):
         """Determine the color to be used based on the level
         of the logger"""
-        if level is None or level not in Default().level_number:
+        if level is None or level not in LEVEL_COLOR:
             raise InvalidLevel(level)
 
-        return Default().color_level_map.get(level, None)
+        return LEVEL_COLOR[level]
 
     def _get_color_replacement(self, special_str, level):
         """Get the colored replacement of the passed
@@ -73,11 +112,12 @@ class ColorFormatter(object):
             # TODO: Check if level is None
             color = self._determine_color_from_level(level)
 
-        replaced_color = self._color_mapping.get(color, self._default)
+        color_mapping, default = _load_colors()
+        replaced_color = color_mapping.get(color, default)
 
         # Do the substitution now
         special_str = special_str.replace(prefix, replaced_color)
-        special_str = special_str.replace(postfix, self._default)
+        special_str = special_str.replace(postfix, default)
 
         return special_str
 
@@ -86,7 +126,7 @@ class ColorFormatter(object):
         and replace them with the colors as passed by the
         user.
         """
-        occurences = findall(r'%.*?%', str_passed)
+        occurences = _get_pattern().findall(str_passed)
 
         for occurence in occurences:
             str_passed = str_passed.replace(occurence,
@@ -100,3 +140,12 @@ class ColorFormatter(object):
         the user and return a formatted string accordingly.
         """
         return self._replace_with_colors(str_passed, level)
+
+    def strip_colors(self, str_passed):
+        """Remove the special characters from the string and
+        keep the string inside them without any color.
+
+        For eg, `%gsample_string%` is changed to `sample_string`.
+        """
+        return _get_pattern().sub(lambda match: match.group()[2:-1],
+                                  str_passed)
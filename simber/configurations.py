@@ -1,7 +1,13 @@
 """File to handle the default configurations
 of the logger."""
 
-from typing import Dict, List
+
+from simber.levels import LEVEL_NUMBER, LEVEL_COLOR
+
+
+# Names of the streams that are standard outputs. Anything else
+# is considered a file.
+VALID_STDOUT_NAMES = ('<stdout>', '<stderr>')
 
 
 class Default(object):
@@ -20,21 +26,9 @@ class Default(object):
         self._console_format = "%a[{levelname}]% [{logger}]"
         self._file_format = "[{levelname}] [{time}] [{filename}]"
         self._log_file_name = "log"
-        self._valid_stdout_names = ['<stdout>', '<stderr>']
-        self._level_number = {
-            "DEBUG": 0,
-            "INFO": 1,
-            "WARNING": 2,
-            "ERROR": 3,
-            "CRITICAL": 4,
-        }
-        self._color_level_map = {
-            "DEBUG": "b",
-            "INFO": "g",
-            "WARNING": "y",
-            "ERROR": "r",
-            "CRITICAL": "r"
-        }
+        self._valid_stdout_names = list(VALID_STDOUT_NAMES)
+        self._level_number = LEVEL_NUMBER
+        self._color_level_map = LEVEL_COLOR
 
     @property
     def console_format(self) -> str:
@@ -45,7 +39,7 @@ class Default(object):
         return self._file_format
 
     @property
-    def level_number(self) -> Dict:
+    def level_number(self) -> dict:
         return self._level_number
 
     @property
@@ -53,11 +47,11 @@ class Default(object):
         return self._log_file_name
 
     @property
-    def valid_stdout_names(self) -> List:
+    def valid_stdout_names(self) -> list:
         return self._valid_stdout_names
 
     @property
-    def color_level_map(self) -> Dict:
+    def color_level_map(self) -> dict:
         return self._color_level_map
 
     def __repr__(self) -> str:
@@ -66,8 +60,8 @@ class Default(object):
         return str({
             'console_format': self.console_format,
             'file_format': self.file_format,
-            'level_number': self.level_number,
+            'level_number': dict(self.level_number),
             'log_file_name': self.log_file_name,
             'valid_stdout_names': self.valid_stdout_names,
-            'color_level_map': self.color_level_map
+            'color_level_map': dict(self.color_level_map)
         })
@@ -0,0 +1,112 @@
+"""Keep fields that are added to every record logged in a context.
+
+Fields like a request id or a tenant are known once per request but
+needed on every line logged while handling it. They can be bound to
+the current context with `bind_context` and are then added to the
+`extra` of every record logged from that context, by any logger.
+
+The fields are kept in a `ContextVar`, so every thread and every
+asyncio task sees its own fields. A task starts with a copy of the
+fields of the code that created it, and a thread starts with none.
+On Python 3.6, which has no contextvars, the fields are kept per
+thread, so the tasks of a thread share them.
+
+The dict of the fields is never changed in place. Binding or unbinding
+builds a new dict, so the loggers can pass it to the records as it is
+and only merge it again once it has changed.
+"""
+
+from contextlib import contextmanager
+from threading import local
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = None
+
+
+class _Token(object):
+    """Value of the variable before it was set."""
+
+    __slots__ = ("old_value",)
+
+    def __init__(self, old_value):
+        self.old_value = old_value
+
+
+class _ThreadContextVar(object):
+    """Keep a value per thread with the methods of `ContextVar` that
+    are used here, for Pythons that do not have contextvars."""
+
+    def __init__(self, name: str, default=None):
+        self.name = name
+        self._default = default
+        self._local = local()
+
+    def get(self):
+        return getattr(self._local, "value", self._default)
+
+    def set(self, value) -> _Token:
+        token = _Token(self.get())
+        self._local.value = value
+        return token
+
+    def reset(self, token: _Token):
+        self._local.value = token.old_value
+
+
+_EMPTY = {}
+
+_context = (ContextVar or _ThreadContextVar)("simber_context",
+                                             default=_EMPTY)
+
+
+def get_context() -> dict:
+    """Get a copy of the fields bound to the current context."""
+    return dict(_context.get())
+
+
+def bind_context(**fields):
+    """Add the fields to the current context, replacing the fields
+    with the same names.
+
+    Returns the token to pass to `reset_context` to go back to the
+    fields present before the call.
+    """
+    return _context.set({**_context.get(), **fields})
+
+
+def unbind_context(*names):
+    """Remove the fields with the passed names from the current
+    context. Names that are not bound are ignored."""
+    current = _context.get()
+
+    return _context.set({name: value for name, value in current.items()
+                         if name not in names})
+
+
+def clear_context():
+    """Remove all the fields from the current context."""
+    return _context.set(_EMPTY)
+
+
+def reset_context(token):
+    """Go back to the fields that were present before the call that
+    returned the token."""
+    _context.reset(token)
+
+
+@contextmanager
+def bound_context(**fields):
+    """Bind the fields to the current context for the duration of
+    the `with` block.
+
+    with bound_context(request_id=request.id):
+        handle(request)
+    """
+    token = bind_context(**fields)
+
+    try:
+        yield
+    finally:
+        _context.reset(token)
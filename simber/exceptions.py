@@ -1,6 +1,6 @@
 """Define exceptions for the logger class"""
 
-from simber.configurations import Default
+from simber.levels import LEVEL_NUMBER
 
 
 class InvalidLevel(Exception):
@@ -20,7 +20,7 @@ class InvalidLevel(Exception):
                   " Expected one of these: {all_levels}"
         return message.format(
             level=level,
-            all_levels=list(Default().level_number.keys())
+            all_levels=list(LEVEL_NUMBER.keys())
         )
 
     def __str__(self):
@@ -30,8 +30,8 @@ class InvalidLevel(Exception):
 class InvalidStream(Exception):
     """Exception for invalid stream
 
-    If the passed stream is not valid, i:e not
-    of type TextIOWrapper, than raise this exception.
+    If the passed stream is not valid, i:e it can
+    not be written to, than raise this exception.
     """
     def __init__(self, passed_type):
         super().__init__()
@@ -41,8 +41,8 @@ class InvalidStream(Exception):
     def _build_message(self, passed_type):
         """Build a message to show the user when this exception
         arises."""
-        message = "Expected <class 'TextIOWrapper'>, got {}".format(
-            passed_type)
+        message = "Expected a stream with a write method, a file " \
+            "descriptor or a socket, got {}".format(passed_type)
 
         return message
 
@@ -66,3 +66,71 @@ class InvalidOutputStream(Exception):
 
     def __str__(self):
         return self.message
+
+
+class InvalidOverflowPolicy(Exception):
+    """Exception for invalid overflow policy
+
+    If the passed overflow policy of an asynchronous stream
+    is not one of the supported ones, raise this exception.
+    """
+    def __init__(self, policy):
+        super().__init__()
+
+        self.message = self._build_message(policy)
+
+    def _build_message(self, policy):
+        message = "{policy}: is an invalid overflow policy."\
+                  " Expected one of these: {all_policies}"
+        return message.format(
+            policy=policy,
+            all_policies=['block', 'drop_newest', 'drop_oldest']
+        )
+
+    def __str__(self):
+        return self.message
+
+
+class InvalidCollectorOptions(Exception):
+    """Exception for options that can not be used with a collector.
+
+    The collector writes the file of the stream, so the stream can
+    not rotate or buffer it. If any of those options is passed along
+    with a collector, raise this exception.
+    """
+    def __init__(self, options):
+        super().__init__()
+
+        self.message = self._build_message(options)
+
+    def _build_message(self, options):
+        message = "{options}: can not be used with a collector."\
+                  " The collector writes the file as it gets the records"
+        return message.format(options=options)
+
+    def __str__(self):
+        return self.message
+
+
+class DuplicateLevel(Exception):
+    """Exception for a level that can not be registered.
+
+    If the name or the number of the level being registered
+    is already used by another level, raise this exception.
+    """
+    def __init__(self, level, number):
+        super().__init__()
+
+        self.message = self._build_message(level, number)
+
+    def _build_message(self, level, number):
+        message = "{level} ({number}): conflicts with an existing level."\
+                  " Registered levels: {all_levels}"
+        return message.format(
+            level=level,
+            number=number,
+            all_levels=dict(LEVEL_NUMBER)
+        )
+
+    def __str__(self):
+        return self.message
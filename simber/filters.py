@@ -0,0 +1,309 @@
+"""Filters that decide which records are written.
+
+A filter is called with every record that passes the level check
+and returns the record that should be written, or None to drop it.
+A filter can return a new record to change what is written, it
+should never change the passed record since the same record is
+passed to all the streams. It can also return a tuple of records
+to write more than one, for eg a summary of the records it dropped
+before the record. The filters after it then run on each of them.
+
+A filter that holds back details of the records it dropped, like
+the number of repeats, can have a `flush` method that returns the
+records to write for them. It is called when the logger or the
+stream is flushed or closed, and on exit. The records it returns
+are written without running the other filters.
+
+Filters can be passed to the `Logger`, in which case they run
+once per record before any of the streams, or to an `OutputStream`
+in which case they only affect that stream.
+"""
+
+from collections.abc import Mapping
+from itertools import count
+from threading import Lock
+from time import monotonic
+from zlib import crc32
+
+from simber.levels import LEVEL_NUMBER
+from simber.message import Message
+
+
+def _uses_caller(filter_) -> bool:
+    """Check if the filter needs the caller, any callable can be
+    used as a filter so the attribute is optional."""
+    return getattr(filter_, "uses_caller", False)
+
+
+def _run_filters(filters: tuple, record):
+    """Run the filters one after the other on the record or on
+    every record of a tuple.
+
+    Returns None if the filters dropped everything, else the record
+    or a tuple of records if a filter returned more than one.
+    """
+    if type(record) is tuple:
+        records = []
+
+        for each in record:
+            each = _run_filters(filters, each)
+
+            if type(each) is tuple:
+                records.extend(each)
+            elif each is not None:
+                records.append(each)
+
+        return tuple(records) or None
+
+    for index, filter_ in enumerate(filters):
+        record = filter_(record)
+
+        if record is None:
+            return None
+
+        if type(record) is tuple:
+            return _run_filters(filters[index + 1:], record)
+
+    return record
+
+
+def _pending_records(filters: tuple) -> list:
+    """Get the records that the filters are holding back, check
+    `Filter.flush`."""
+    records = []
+
+    for filter_ in filters:
+        flush = getattr(filter_, "flush", None)
+
+        if flush is not None:
+            records.extend(flush())
+
+    return records
+
+
+class Filter(object):
+    """Base class of the filters, lets every record through.
+
+    uses_caller should be True if the filter needs the details of
+    the caller in the record, so that the logger finds them.
+    """
+
+    uses_caller = False
+
+    def __call__(self, record):
+        return record
+
+    def flush(self) -> tuple:
+        """Get the records to write for the details the filter is
+        holding back and forget them."""
+        return ()
+
+
+class RateLimitFilter(Filter):
+    """Limit the number of records written from every call site.
+
+    rate:       Number of records allowed per second from one call
+                site once the burst is used up.
+    burst:      Number of records that can be written from one call
+                site at once. Defaults to the rate.
+
+    Every call site, that is the file and the line the log method
+    was called from, gets its own token bucket. Records that find
+    the bucket empty are dropped and counted in `suppressed`.
+    """
+
+    uses_caller = True
+
+    def __init__(self, rate: float = 10, burst: float = None):
+        self._rate = rate
+        self._burst = rate if burst is None else burst
+        self._buckets = {}
+        self._lock = Lock()
+        self.suppressed = 0
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def burst(self) -> float:
+        return self._burst
+
+    def __call__(self, record):
+        site = (record.filename, record.lineno)
+        now = monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(site)
+
+            if bucket is None:
+                bucket = self._buckets[site] = [self._burst, now]
+            else:
+                # Fill the bucket for the time that has passed
+                bucket[0] = min(self._burst,
+                                bucket[0] + (now - bucket[1]) * self._rate)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                self.suppressed += 1
+                return None
+
+            bucket[0] -= 1
+
+        return record
+
+
+class DuplicateFilter(Filter):
+    """Collapse the same message repeated from one call site.
+
+    interval:   Number of seconds after which a repeated message is
+                written again along with the number of times it
+                was repeated.
+
+    The first record of a message is written and the same message
+    repeated from the same call site is dropped. Once `interval`
+    seconds have passed, the next repeat is written as
+    `<message> (repeated N times)`. The repeats are counted in
+    `suppressed`.
+
+    If another message is logged from the call site while repeats
+    are pending, the count is written for the last repeat before the
+    new record. Counts that are still pending are written on flush.
+    """
+
+    uses_caller = True
+
+    def __init__(self, interval: float = 10.0):
+        self._interval = interval
+        self._last = {}
+        self._lock = Lock()
+        self.suppressed = 0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def _summarize(self, record, message: str, repeated: int):
+        """Get the record that shows the number of repeats."""
+        return record.copy(msg=Message(
+            "%s (repeated %d %s)",
+            (message, repeated, "time" if repeated == 1 else "times")))
+
+    def __call__(self, record):
+        site = (record.filename, record.lineno)
+        message = record.message
+        now = monotonic()
+
+        with self._lock:
+            last = self._last.get(site)
+
+            # Message, pending repeats, time of the last write and
+            # the last repeat
+            if last is None or last[0] != message:
+                self._last[site] = [message, 0, now, None]
+
+                if last is None or not last[1]:
+                    return record
+
+                return (self._summarize(last[3], last[0], last[1]),
+                        record)
+
+            last[1] += 1
+            last[3] = record
+
+            if now - last[2] < self._interval:
+                self.suppressed += 1
+                return None
+
+            repeated = last[1]
+            last[1] = 0
+            last[2] = now
+            last[3] = None
+
+        return self._summarize(record, message, repeated)
+
+    def flush(self) -> tuple:
+        """Get the records with the counts of the pending repeats."""
+        with self._lock:
+            pending = [(last[3], last[0], last[1])
+                       for last in self._last.values() if last[1]]
+
+            for last in self._last.values():
+                last[1] = 0
+                last[3] = None
+
+        return tuple(self._summarize(*details) for details in pending)
+
+
+class SamplingFilter(Filter):
+    """Keep only one in every N records of the sampled levels.
+
+    every:      Keep one in `every` records. Either a number used for
+                all the levels below `min_level`, or a dict of the
+                level name to the number, in which case the levels
+                not present in it are not sampled.
+    key:        Sample by a value instead of by a counter. Either the
+                name of a keyword argument passed to the log method,
+                for eg "request_id", or a callable that takes the
+                record. All the records with the same value are
+                either kept or dropped, so a sampled request is
+                logged entirely. Records without the value fall back
+                to the counter.
+    min_level:  Records of this level and above are always kept.
+                Defaults to ERROR.
+
+    The filter does not need the caller, so on a `Logger` it runs
+    before the caller is looked up and dropped records are never
+    formatted. The dropped records are counted in `suppressed`, the
+    count is not exact if many threads log at once.
+    """
+
+    def __init__(self, every=10, key=None, min_level: str = "ERROR"):
+        if isinstance(every, Mapping):
+            self._default = None
+            self._every = {LEVEL_NUMBER[level]: number
+                           for level, number in every.items()}
+        else:
+            self._default = every
+            self._every = {}
+
+        self._key = key
+        self._min_level = LEVEL_NUMBER[min_level]
+        self._counters = {}
+        self.suppressed = 0
+
+    def _get_key(self, record):
+        """Get the value to sample the record by, None if there
+        is none."""
+        if callable(self._key):
+            return self._key(record)
+
+        return record.extra.get(self._key) if record.extra else None
+
+    def __call__(self, record):
+        levelno = record.levelno
+        if levelno >= self._min_level:
+            return record
+
+        every = self._every.get(levelno, self._default)
+        if not every or every <= 1:
+            return record
+
+        value = None if self._key is None else self._get_key(record)
+
+        if value is not None:
+            # crc32 is used since, unlike hash, it is the same in
+            # all the processes.
+            keep = crc32(str(value).encode("utf-8")) % every == 0
+        else:
+            counter = self._counters.get(levelno)
+            if counter is None:
+                counter = self._counters.setdefault(levelno, count())
+
+            keep = next(counter) % every == 0
+
+        if keep:
+            return record
+
+        self.suppressed += 1
+        return None
@@ -2,10 +2,74 @@
 the format of the strings that are printed.
 """
 
-from datetime import datetime
+from time import time
 
-from simber.configurations import Default
+from simber.levels import LEVEL_COLOR, LEVEL_NAME
 from simber.colors import ColorFormatter
+from simber.message import Message
+from simber.record import LogRecord
+
+
+class TimeCache(object):
+    """Cache the rendered time strings per format.
+
+    Rendering the time with strftime is costly, but most formats
+    only change once a second. So the rendered string is kept for
+    every format and reused while the second has not changed. If
+    the format contains `%f`, the parts around it are cached and
+    only the microseconds are filled in for every record.
+    """
+
+    def __init__(self):
+        self._cache = {}
+
+    def _split_format(self, strformat: str):
+        """Split the format at every `%f`, leaving `%%f` alone."""
+        parts = []
+        current = []
+        index = 0
+
+        while index < len(strformat):
+            if strformat[index] == "%" and index + 1 < len(strformat):
+                if strformat[index + 1] == "f":
+                    parts.append("".join(current))
+                    current = []
+                else:
+                    current.append(strformat[index:index + 2])
+
+                index += 2
+                continue
+
+            current.append(strformat[index])
+            index += 1
+
+        parts.append("".join(current))
+        return parts
+
+    def get(self, strformat: str, timestamp: float) -> str:
+        """Get the time string for the passed timestamp in the
+        passed format."""
+        second = int(timestamp)
+        cached = self._cache.get(strformat)
+
+        if cached is None or cached[0] != second:
+            # Only imported once a time is formatted
+            from datetime import datetime
+
+            current_time = datetime.fromtimestamp(second)
+            cached = (second, [current_time.strftime(part) for part in
+                               self._split_format(strformat)])
+            self._cache[strformat] = cached
+
+        rendered = cached[1]
+        if len(rendered) == 1:
+            return rendered[0]
+
+        microsecond = min(int((timestamp - second) * 1e6), 999999)
+        return "{:06d}".format(microsecond).join(rendered)
+
+
+_time_cache = TimeCache()
 
 
 class Formatter(object):
@@ -20,12 +84,18 @@ class Formatter(object):
     def __init__(self):
         pass
 
-    def _get_time(self, strformat: str = "%d/%m/%Y %H:%M:%S"):
-        """Get the time, based on the string passed."""
+    def _get_time(self, strformat: str = "%d/%m/%Y %H:%M:%S",
+                  created: float = None):
+        """Get the time, based on the string passed.
+
+        created is the timestamp of the record, if not passed the
+        current time is used.
+        """
         if type(strformat) != str:
             raise TypeError(
                 f"strformat should be str, {type(strformat)} passed")
-        return datetime.now().strftime(strformat)
+        return _time_cache.get(strformat,
+                               time() if created is None else created)
 
     def _get_caller_details(self, last_to_last_frame):
         """Get the name of the file that called the logger."""
@@ -37,15 +107,12 @@ class Formatter(object):
 
     def _get_level(self, level_no: int):
         """Get the level info from the passed level"""
-        level_info = Default().level_number
-
-        if level_no not in list(level_info.values()):
+        if level_no not in LEVEL_NAME:
             raise Exception("{}: Not a valid level".format(level_no))
 
         return {
             'levelno': level_no,
-            'levelname': [key for (key, value) in level_info.items()
-                          if value == level_no][0]
+            'levelname': LEVEL_NAME[level_no]
         }
 
     def _add_message_if_not_present(self, unformatted_str):
@@ -58,7 +125,18 @@ class Formatter(object):
 
         return unformatted_str
 
-    def sub(self, unformatted_str, level, name, frame, message, time_format):
+    def compile(self, unformatted_str, colors=True):
+        """Compile the passed format string into a template
+        that can be used to format records again and again
+        without parsing the string every time.
+
+        If colors is False, the color codes are removed from
+        the format.
+        """
+        return FormatTemplate(unformatted_str, self, colors)
+
+    def sub(self, unformatted_str, level, name, frame, message, time_format,
+            created=None):
         """Format the passed strings with the paramaters
         as possible.
 
@@ -69,27 +147,147 @@ class Formatter(object):
         :return: The formatted string
         :rtype: str
         """
-        current_time = self._get_time(
-            **({"strformat": time_format} if time_format is not None else {}))
-        caller_info = self._get_caller_details(frame)
-        level_info = self._get_level(level)
+        record = LogRecord(
+            level,
+            self._get_level(level)["levelname"],
+            name,
+            time() if created is None else created,
+            message if isinstance(message, Message) else Message(message)
+        )
+
+        if frame is not None:
+            record.set_caller(frame)
+
+        return self.compile(unformatted_str).render(record, time_format)
+
+
+class FormatTemplate(object):
+    """Hold a format string that is already parsed.
+
+    The template keeps a note of the fields that are used
+    in the format so that only those fields are calculated
+    when a record is formatted. For eg, the time is not
+    calculated if the format does not contain `{time}`.
+
+    The color codes are replaced in the format string, not in
+    the formatted record, so a `%` in the message is never
+    taken as a color code. The colored format is built once
+    for every level and kept till the color of the level
+    changes. If colors is False, the codes
+    are removed from the format once.
 
-        # Add message if not already present
-        unformatted_str = self._add_message_if_not_present(
+    Any other field, like `{request_id}`, is taken from the
+    extra fields of the record, which include the fields bound
+    to the logger or to the context. It is empty if the record
+    does not have it.
+    """
+
+    _caller_fields = frozenset(("filename", "funcname", "lineno"))
+    _level_fields = frozenset(("levelname", "levelno"))
+    _record_fields = frozenset(("logger", "message", "time")) | \
+        _caller_fields | _level_fields
+
+    def __init__(self, unformatted_str, formatter=None, colors=True):
+        self._source = unformatted_str
+        self._formatter = Formatter() if formatter is None else formatter
+
+        self._format = self._formatter._add_message_if_not_present(
             unformatted_str)
+        self._has_colors = "%" in self._format
 
-        unformatted_str = unformatted_str.format(
-            time=current_time,
-            filename=caller_info['filename'],
-            funcname=caller_info['name'],
-            lineno=caller_info['line_no'],
-            levelname=level_info['levelname'],
-            levelno=level_info['levelno'],
-            logger=name,
-            message=message
-        )
+        if self._has_colors and not colors:
+            self._format = ColorFormatter().strip_colors(self._format)
+            self._has_colors = False
 
-        # Pass it through the color formatter
-        unformatted_str = ColorFormatter().format_colors(unformatted_str,
-                                                         level_info["levelname"])
-        return unformatted_str
+        # Color and colored format for every level name
+        self._colored = {}
+        self._fields = self._extract_fields(self._format)
+
+        self._uses_time = "time" in self._fields
+        self._uses_caller = bool(self._fields & self._caller_fields)
+        self._uses_level = bool(self._fields & self._level_fields)
+        self._extra_fields = tuple(self._fields - self._record_fields)
+
+    def _extract_fields(self, format_str):
+        """Extract the names of all the fields used in the passed
+        format string.
+
+        Only the name of the field is considered, so `{lineno:>4}`
+        and `{time!r}` will give `lineno` and `time` respectively.
+        """
+        # Imported here since it imports re, which is slow
+        from string import Formatter as StringFormatter
+
+        fields = set()
+
+        for _, field_name, _, _ in StringFormatter().parse(format_str):
+            if not field_name:
+                continue
+
+            fields.add(field_name.split(".")[0].split("[")[0])
+
+        return frozenset(fields)
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @property
+    def fields(self) -> frozenset:
+        return self._fields
+
+    @property
+    def uses_caller(self) -> bool:
+        return self._uses_caller
+
+    @property
+    def has_colors(self) -> bool:
+        return self._has_colors
+
+    def _get_colored(self, levelname):
+        """Get the format with the colors of the level, building
+        it if this is the first record of the level or if the color
+        of the level changed."""
+        color = LEVEL_COLOR.get(levelname)
+        cached = self._colored.get(levelname)
+
+        if cached is None or cached[0] != color:
+            cached = (color, ColorFormatter().format_colors(
+                self._format, levelname))
+            self._colored[levelname] = cached
+
+        return cached[1]
+
+    def render(self, record, time_format=None):
+        """Format a record with the template.
+
+        Only the fields that are present in the format are
+        taken from the record and passed to the string.
+        """
+        values = {"logger": record.name, "message": record.msg}
+
+        if self._uses_time:
+            values["time"] = self._formatter._get_time(
+                **({"strformat": time_format}
+                   if time_format is not None else {}),
+                created=record.created)
+
+        if self._uses_caller:
+            values["filename"] = record.filename
+            values["funcname"] = record.funcname
+            values["lineno"] = record.lineno
+
+        if self._uses_level:
+            values["levelname"] = record.levelname
+            values["levelno"] = record.levelno
+
+        if self._extra_fields:
+            extra = record.extra or {}
+
+            for field in self._extra_fields:
+                values[field] = extra.get(field, "")
+
+        if not self._has_colors:
+            return self._format.format(**values)
+
+        return self._get_colored(record.levelname).format(**values)
@@ -0,0 +1,70 @@
+"""Registry of the levels supported by the logger.
+
+The tables are built once when the module is imported and are
+exposed as read only mappings so that the write path can look up
+a level in O(1) without building anything.
+
+LEVEL_NUMBER:       Name of the level to the number of the level.
+LEVEL_NAME:         Number of the level to the name of the level.
+LEVEL_COLOR:        Name of the level to the color code used for it.
+"""
+
+from types import MappingProxyType
+
+
+_level_number = {
+    "DEBUG": 0,
+    "INFO": 1,
+    "WARNING": 2,
+    "ERROR": 3,
+    "CRITICAL": 4,
+}
+
+_level_color = {
+    "DEBUG": "b",
+    "INFO": "g",
+    "WARNING": "y",
+    "ERROR": "r",
+    "CRITICAL": "r"
+}
+
+_level_name = {number: name for (name, number) in _level_number.items()}
+
+
+LEVEL_NUMBER = MappingProxyType(_level_number)
+LEVEL_NAME = MappingProxyType(_level_name)
+LEVEL_COLOR = MappingProxyType(_level_color)
+
+
+def register_level(name: str, number, color: str = "w"):
+    """Add a new level to the registry.
+
+    name:       Name of the level, it is converted to uppercase.
+    number:     Number of the level, levels with a lower number are
+                less severe. It does not need to be an integer, so
+                a level can be placed between two existing ones,
+                for eg 1.5 for a level between INFO and WARNING.
+    color:      Color code to use for the level when `%a` is used
+                in the format. Check `simber.colors.ColorFormatter`.
+
+    Registering the same level again with the same number only
+    updates the color. Raises `DuplicateLevel` if the name or the
+    number is already used by another level.
+
+    Use `Logger.register_level` to also get a log method for the
+    level.
+    """
+    # Imported here since exceptions use the registry
+    from simber.exceptions import DuplicateLevel
+
+    name = name.upper()
+
+    if _level_number.get(name, number) != number or \
+            _level_name.get(number, name) != name:
+        raise DuplicateLevel(name, number)
+
+    _level_number[name] = number
+    _level_name[number] = name
+    _level_color[name] = color
+
+    return name
@@ -7,18 +7,98 @@ for all Python apps.
 
 Copyright (c) 2020 Deepjyoti Barman <deep.barman30@gmail.com>
 """
-from pathlib import Path
+import atexit
 import os
 from sys import _getframe, stdout
-from colorama import init
-from typing import List, Dict
-
-from simber.configurations import Default
+from threading import Lock, RLock
+from time import time
+from weakref import WeakSet, WeakValueDictionary, finalize
+
+from simber.configurations import Default, VALID_STDOUT_NAMES
+from simber.context import _context
+from simber.filters import _pending_records, _run_filters, _uses_caller
+from simber.levels import LEVEL_NAME, register_level
+from simber.message import Message
+from simber.record import LogRecord
 from simber.stream import OutputStream
-from simber.exceptions import InvalidLevel, InvalidOutputStream
+from simber.exceptions import (
+    DuplicateLevel, InvalidLevel, InvalidOutputStream
+)
+
+# Loggers by their name, used to find the parents of the loggers
+# and by `get_logger`. Loggers that are not used anymore are
+# removed automatically.
+_registry = WeakValueDictionary()
+_registry_lock = RLock()
+
+# Loggers returned by `get_logger`, kept alive so that a logger can be
+# configured by name and fetched again later, like `logging` does.
+_loggers = {}
+
+
+def get_logger(name: str, **kwargs) -> "Logger":
+    """Get the logger with the passed name, creating it with the
+    passed kwargs if it does not exist yet.
+
+    Dots in the name make up the hierarchy, so `app.db` is below
+    `app` and writes to the streams of `app` as well.
+
+    Unlike a `Logger` created directly, the default console and file
+    streams belong to the logger and are not shared with all the
+    loggers, unless `shared_streams=True` is passed. Records then only
+    reach the streams of the logger and of the loggers above it.
+
+    The returned logger is kept alive, so any logger configured
+    through `get_logger` is found again with the same name. Loggers
+    created directly are forgotten once they are not used.
+    """
+    with _registry_lock:
+        logger = _registry.get(name)
+
+        if logger is None:
+            kwargs.setdefault("shared_streams", False)
+            logger = Logger(name, **kwargs)
+
+        _loggers[name] = logger
+        return logger
+
+
+def _bump_revision():
+    """Make all the loggers find their streams again, for eg once
+    a logger in the hierarchy is gone."""
+    OutputStream._revision += 1
+
+
+def _get_caller(depth: int):
+    """Get the frame `depth` levels above the function calling this.
+
+    If the stack is not that deep, the outermost frame is returned.
+    """
+    try:
+        return _getframe(depth + 1)
+    except ValueError:
+        frame = _getframe(1)
+        while frame.f_back is not None:
+            frame = frame.f_back
 
-# Init colorama for windows
-init()
+        return frame
+
+
+def _make_log_method(method_name: str, level_number):
+    """Build the log method for a registered level.
+
+    The level number is bound in the method so that logging
+    does not need any lookup.
+    """
+    def log(self, message, *args, stacklevel: int = 1, **extra):
+        self._write(message, args, level_number, extra, stacklevel)
+
+    log.__name__ = method_name
+    log.__doc__ = "Add the message if the level is {} or less.".format(
+        method_name)
+    log._simber_level = level_number
+
+    return log
 
 
 class Logger(object):
@@ -60,10 +140,47 @@ class Logger(object):
                         `disable_file` and `level` attribute.
     time_format:        Format for the time string. String to change the way
                         the time string looks when {time} is printed.
+    asynchronous:       If to write the default streams from a background
+                        thread. Check `OutputStream` for more details.
+    buffer_size:        Number of bytes to buffer before writing to the file.
+                        By default the file stream is not buffered.
+    flush_interval:     Maximum number of seconds a record can stay in the
+                        buffer of the file stream.
+    max_bytes:          Rotate the log file once it grows beyond this size.
+                        By default the file is not rotated on size.
+    rotate_interval:    Rotate the log file every `rotate_interval` seconds.
+                        By default the file is not rotated on time.
+    backup_count:       Number of rotated log files to keep. Defaults to 5.
+    compress:           If to gzip the rotated log files in the background.
+    collector:          Address of a `simber.multiprocess.LogCollector` that
+                        should write the log file for this process. It can
+                        not be used with `buffer_size`, `max_bytes` or
+                        `rotate_interval`.
+    atomic_append:      If to write every record to the log file with one
+                        `os.write` on a file opened with O_APPEND.
+    timing:             If the default streams should keep histograms of the
+                        time taken to format and write the records. Check
+                        `stats()`.
+    filters:            List of filters that are run for every record before
+                        it is passed to the streams. Check `simber.filters`.
+    propagate:          If to write to the streams of the loggers above this
+                        one in the hierarchy. The loggers at the top write
+                        to the shared streams. Defaults to True.
+    shared_streams:     If to add the default console and file streams to the
+                        streams shared by all the loggers, so every logger
+                        writes to them. Defaults to True to keep the behaviour
+                        of the earlier versions, `get_logger` passes False so
+                        that the streams only belong to the logger.
     """
 
-    _instances = []
-    _streams = set()
+    _instances = WeakSet()
+
+    # The streams shared by all the loggers. They are kept in a tuple
+    # that is never changed in place. Adding or removing a stream
+    # builds a new tuple and swaps it under the lock, so writing never
+    # needs the lock and never sees the streams change while iterating.
+    _streams = ()
+    _streams_lock = Lock()
 
     def __init__(
         self,
@@ -72,6 +189,19 @@ class Logger(object):
     ):
         self.name = name
         self._level_number = Default().level_number
+
+        # Streams of this logger only and the cached streams that it
+        # writes to, along with the minimum level among them. Any
+        # record below that level is dropped right away.
+        self._own_streams = ()
+        self._propagate = kwargs.get("propagate", True)
+        self._shared_streams = kwargs.get("shared_streams", True)
+        self._set_filters(tuple(kwargs.get("filters", ())))
+        self._resolved_streams = ()
+        self._needs_caller = True
+        self._min_level = float("inf")
+        self._min_level_revision = -1
+        self.reset_stats(streams=False)
         self._passed_level = kwargs.get("level", "INFO")
         self._passed_file_level = kwargs.get("file_level", "DEBUG")
         self.level = self._level_number[self._passed_level]
@@ -79,10 +209,24 @@ class Logger(object):
         self._disable_file = kwargs.get("disable_file", False)
         self._log_file = self._check_logfile(kwargs.get("log_path", None))
         self._time_format = kwargs.get("time_format", None)
+        self._asynchronous = kwargs.get("asynchronous", False)
+        self._timing = kwargs.get("timing", False)
+        self._file_options = {
+            "buffer_size": kwargs.get("buffer_size", 0),
+            "flush_interval": kwargs.get("flush_interval", 1.0),
+            "max_bytes": kwargs.get("max_bytes", 0),
+            "rotate_interval": kwargs.get("rotate_interval", 0),
+            "backup_count": kwargs.get("backup_count", 5),
+            "compress": kwargs.get("compress", False),
+            "collector": kwargs.get("collector", None),
+            "atomic_append": kwargs.get("atomic_append", False)
+        }
 
         self._check_format(kwargs.get("format", None),
                            kwargs.get("file_format", None))
+        self._register()
         self._init_default_streams()
+        self._update_min_level()
 
         # Update all instances, if asked to
         if kwargs.get("update_all", False):
@@ -90,7 +234,38 @@ class Logger(object):
             self.update_disable_file(self._disable_file)
             self.update_level(self._passed_level)
 
-        self._instances.append(self)
+        self._instances.add(self)
+
+    def _register(self):
+        """Add the logger to the registry if no other logger with
+        the same name is present.
+
+        Loggers below this one in the hierarchy need to find their
+        streams again, so the revision is bumped. It is bumped again
+        once the logger is collected and removed from the registry.
+        """
+        with _registry_lock:
+            if _registry.setdefault(self.name, self) is self:
+                OutputStream._revision += 1
+                finalize(self, _bump_revision)
+
+    def _get_parent(self):
+        """Get the closest logger above this one in the hierarchy.
+
+        For eg, for `app.db.query` this is `app.db` if present,
+        else `app`. Returns None if there is none, in which case
+        the shared streams are the parent.
+        """
+        name = self.name
+
+        while isinstance(name, str) and "." in name:
+            name = name.rsplit(".", 1)[0]
+            parent = _registry.get(name)
+
+            if parent is not None:
+                return parent
+
+        return None
 
     def _init_default_streams(self):
         """Initialize the default streams
@@ -100,15 +275,20 @@ class Logger(object):
 
         stdout - Required
         file_stream - If disabled, this will be skipped
+
+        They are added to the shared streams or to the streams of this
+        logger only, as per `shared_streams`.
         """
         # Initialize the default stdout stream
-        self._streams.add(
+        self._add_to_streams(
             OutputStream(
                 stdout,
                 self._passed_level,
                 self._console_format,
-                time_format=self._time_format
-            ))
+                time_format=self._time_format,
+                asynchronous=self._asynchronous,
+                timing=self._timing
+            ), self._shared_streams)
 
         # If log_file is invalid, skip creating the file
         # stream.
@@ -118,14 +298,17 @@ class Logger(object):
         # Initialize the file stream
         # Even if the disable_file flag is passed, add this stream
         # because file can be enabled later.
-        self._streams.add(
+        self._add_to_streams(
             OutputStream(
                 open(self._log_file, "a", encoding="utf-8"),
                 self._passed_file_level,
                 self._file_format,
                 self._disable_file,
-                time_format=self._time_format
-            ))
+                time_format=self._time_format,
+                asynchronous=self._asynchronous,
+                timing=self._timing,
+                **self._file_options
+            ), self._shared_streams)
 
     def _check_format(self, format_passed, file_format):
         """Check the format that needs to be used.
@@ -165,6 +348,10 @@ class Logger(object):
             self._disable_file = True
             return log_path
 
+        # Imported here since it is slow to import and only
+        # needed if a log path is passed.
+        from pathlib import Path
+
         # If it is passed, make it a Path object
         log_path = Path(log_path).expanduser()
 
@@ -184,28 +371,219 @@ class Logger(object):
 
         return str(log_path)
 
-    def _extract_args(self, message, other_str):
-        """Extract the args and append them to the message,
-        seperated by a space"""
-        return "{} {}".format(message, ' '.join(other_str))
+    def _extract_args(self, message, args):
+        """Wrap the message and the args so that the message is
+        only built when a stream writes it. Check
+        `simber.message.Message` for how the message is built."""
+        return Message(message, args)
+
+    def _add_to_streams(self, stream: OutputStream,
+                        shared: bool = True) -> bool:
+        """Add the stream to the shared streams, or to the streams
+        of this logger only if shared is False, if an equal stream
+        is not already present.
+
+        Returns False if the stream was already present.
+        """
+        with Logger._streams_lock:
+            current = Logger._streams if shared else self._own_streams
+
+            if stream in current:
+                return False
+
+            if shared:
+                Logger._streams = current + (stream,)
+            else:
+                self._own_streams = current + (stream,)
+
+            OutputStream._revision += 1
+
+        return True
+
+    def _remove_from_streams(self, stream: OutputStream):
+        """Remove the stream from the streams of this logger or
+        from the shared streams.
+
+        Raises KeyError if the stream is not present.
+        """
+        with Logger._streams_lock:
+            if stream in self._own_streams:
+                self._own_streams = tuple(
+                    present for present in self._own_streams
+                    if present != stream)
+            elif stream in Logger._streams:
+                Logger._streams = tuple(
+                    present for present in Logger._streams
+                    if present != stream)
+            else:
+                raise KeyError(stream)
+
+            OutputStream._revision += 1
+
+    def _resolve_streams(self) -> tuple:
+        """Find all the streams the logger writes to.
+
+        These are the streams of the logger followed by the
+        streams of the parent if the logger propagates. The
+        top most loggers propagate to the shared streams.
+        """
+        streams = list(self._own_streams)
+
+        if self._propagate:
+            parent = self._get_parent()
+            inherited = Logger._streams if parent is None \
+                else parent._get_streams()
+
+            streams.extend(stream for stream in inherited
+                           if stream not in streams)
+
+        return tuple(streams)
+
+    def _get_streams(self) -> tuple:
+        """Get the streams of the logger, resolving them again only
+        if something changed."""
+        if self._min_level_revision != OutputStream._revision:
+            self._update_min_level()
 
-    def _write(self, message, args, level):
+        return self._resolved_streams
+
+    def _update_min_level(self):
+        """Resolve the streams of the logger and recompute the
+        effective minimum level.
+
+        This is the lowest level among all the enabled streams. If
+        there are no enabled streams, nothing can be written so the
+        level is set to infinity.
+
+        The caller is only found for the records if at least one of
+        the enabled streams needs it.
+        """
+        revision = OutputStream._revision
+        streams = self._resolve_streams()
+        enabled = [stream for stream in streams if not stream.disabled]
+        levels = [stream.level for stream in enabled]
+
+        self._resolved_streams = streams
+        self._needs_caller = \
+            any(stream.uses_caller for stream in enabled) or \
+            bool(self._late_filters)
+        self._min_level = min(levels) if levels else float("inf")
+        self._min_level_revision = revision
+
+    def is_enabled_for(self, level) -> bool:
+        """Check if a record of the passed level would be written
+        by at least one of the streams.
+
+        The level can either be the name of the level or the
+        level number. This is useful to skip building expensive
+        arguments for levels that will be dropped anyway.
+        """
+        if isinstance(level, str):
+            if level not in self._level_number:
+                raise InvalidLevel(level)
+
+            level = self._level_number[level]
+
+        if self._min_level_revision != OutputStream._revision:
+            self._update_min_level()
+
+        return level >= self._min_level
+
+    def _write(self, message, args, level, extra=None, stacklevel=1,
+               fields=None):
         """
             Write the logs.
             level is the levelnumber of the level that is calling the
             _write function.
+            extra is a dict of the keyword arguments passed to the log
+            method, streams like the JSON stream write them as fields.
+            stacklevel is the number of frames above the log method
+            to take the caller from, 1 being the caller of the log
+            method.
+            fields is the dict of the context fields to add to extra,
+            by default the fields bound to the current context. It is
+            never changed.
+
+            One `LogRecord` is built and passed to all the streams.
         """
-        # Get the frame of the caller
-        caller_frame = _getframe().f_back.f_back
-        message = self._extract_args(message, args)
+        # Drop the record early if none of the streams will
+        # accept it.
+        if self._min_level_revision != OutputStream._revision:
+            self._update_min_level()
+
+        if level < self._min_level:
+            self._filtered += 1
+            return
 
-        for stream in self._streams:
-            stream.write(
-                message,
-                level,
-                caller_frame,
-                self.name
-            )
+        if fields is None:
+            fields = _context.get()
+
+        # The fields are shared by the records as long as they do not
+        # change, they are only merged if the log method was passed
+        # keyword arguments, which take precedence.
+        if fields:
+            if not extra:
+                extra = fields
+            else:
+                for key, value in fields.items():
+                    extra.setdefault(key, value)
+
+        # Build the record once for all the streams, the time is
+        # captured here so that all the streams show the same.
+        record = LogRecord(
+            level,
+            LEVEL_NAME[level],
+            self.name,
+            time(),
+            self._extract_args(message, args),
+            extra
+        )
+
+        # Filters that do not need the caller, like sampling, run
+        # first so that dropped records never look up the caller.
+        if self._early_filters:
+            record = _run_filters(self._early_filters, record)
+
+            if record is None:
+                self._suppressed += 1
+                return
+
+        # Copy the details of the caller and let go of the frame,
+        # only if a stream or a filter needs them.
+        if self._needs_caller:
+            caller_frame = _get_caller(stacklevel + 1)
+
+            if type(record) is tuple:
+                # Records made by a filter for earlier calls keep
+                # their own caller.
+                for each in record:
+                    if each.filename is None:
+                        each.set_caller(caller_frame)
+            else:
+                record.set_caller(caller_frame)
+
+            del caller_frame
+
+        if self._late_filters:
+            record = _run_filters(self._late_filters, record)
+
+            if record is None:
+                self._suppressed += 1
+                return
+
+        if type(record) is tuple:
+            self._accepted += len(record)
+
+            for each in record:
+                for stream in self._resolved_streams:
+                    stream.write(each)
+
+            return
+
+        self._accepted += 1
+
+        for stream in self._resolved_streams:
+            stream.write(record)
 
     def _disable_file_streams(self):
         """Disable the file streams.
@@ -216,9 +594,9 @@ class Logger(object):
         This won't have any effect if the log_file path was not
         passed during init.
         """
-        valid_names = Default().valid_stdout_names
+        valid_names = VALID_STDOUT_NAMES
 
-        for stream in self._streams:
+        for stream in self._get_streams():
             if stream.stream_name not in valid_names:
                 stream.disabled = self._disable_file
 
@@ -233,13 +611,15 @@ class Logger(object):
         if level not in self._level_number:
             raise InvalidLevel(level)
 
-        valid_names = Default().valid_stdout_names
+        valid_names = VALID_STDOUT_NAMES
 
         # Update the level for only stdout outputs
-        for stream in self._streams:
+        for stream in self._get_streams():
             if stream.stream_name in valid_names:
                 stream.level = self._level_number[level]
 
+        self._update_min_level()
+
     def update_file_level(self, level):
         """
         Update the level of all the file streams.
@@ -250,19 +630,22 @@ class Logger(object):
         if level not in self._level_number:
             raise InvalidLevel(level)
 
-        valid_names = Default().valid_stdout_names
+        valid_names = VALID_STDOUT_NAMES
 
         # Update the level for only stdout outputs
-        for stream in self._streams:
+        for stream in self._get_streams():
             if stream.stream_name not in valid_names:
                 stream.level = self._level_number[level]
 
+        self._update_min_level()
+
     def update_disable_file(self, disable_file):
         """
         Update the disable file variable.
         """
         self._disable_file = disable_file
         self._disable_file_streams()
+        self._update_min_level()
 
     def update_format(self, format, file_format=None):
         """Update the format of all the instances.
@@ -270,10 +653,10 @@ class Logger(object):
         We need to update the instances seperately based
         on the type of the stream.
         """
-        valid_stdout_names = Default().valid_stdout_names
+        valid_stdout_names = VALID_STDOUT_NAMES
         file_format = format if file_format is None else file_format
 
-        for stream in self._streams:
+        for stream in self._get_streams():
             if stream.stream_name in valid_stdout_names:
                 # Probably a console format
                 stream.format = format
@@ -288,24 +671,58 @@ class Logger(object):
         for file and console and both are updated throug
         one instance.
         """
-        valid_names = Default().valid_stdout_names
+        valid_names = VALID_STDOUT_NAMES
 
-        for stream in self._streams:
+        for stream in self._get_streams():
             if stream.stream_name not in valid_names:
                 stream.format = format
 
-    def add_stream(self, stream_to_be_added: OutputStream):
+    def add_stream(self, stream_to_be_added: OutputStream,
+                   shared: bool = True):
         """Add the passed stream to the _streams class so
         that it can be used to write to that as well.
+
+        If shared is False, the stream is only added to this
+        logger and the loggers below it in the hierarchy.
         """
         if not isinstance(stream_to_be_added, OutputStream):
             raise InvalidOutputStream(type(stream_to_be_added))
 
-        self._streams.add(stream_to_be_added)
+        self._add_to_streams(stream_to_be_added, shared)
+        self._update_min_level()
+
+    def bind(self, **fields) -> "BoundLogger":
+        """Get a view of the logger that adds the passed fields to
+        every record it logs. Check `BoundLogger`."""
+        return BoundLogger(self, fields)
+
+    def _set_filters(self, filters: tuple):
+        """Set the filters of the logger.
+
+        The filters that do not need the caller are run before it
+        is looked up, the rest after it, each in the passed order.
+        """
+        self._filters = filters
+        self._early_filters = tuple(filter_ for filter_ in filters
+                                    if not _uses_caller(filter_))
+        self._late_filters = tuple(filter_ for filter_ in filters
+                                   if _uses_caller(filter_))
+        OutputStream._revision += 1
+
+    def add_filter(self, filter_):
+        """Add a filter that is run for every record of the logger
+        before it is passed to the streams. Check `simber.filters`
+        for the available filters."""
+        self._set_filters(self._filters + (filter_,))
+
+    def remove_filter(self, filter_):
+        """Remove the passed filter from the logger."""
+        self._set_filters(tuple(present for present in self._filters
+                                if present is not filter_))
 
     def remove_stream(self, stream_to_be_removed: OutputStream):
         """
-        Remove the passed stream from the _streams set and
+        Remove the passed stream from the _streams and
         accordingly destroy it from memory by destroying the
         stream with del.
 
@@ -315,12 +732,70 @@ class Logger(object):
         if not isinstance(stream_to_be_removed, OutputStream):
             raise InvalidOutputStream(type(stream_to_be_removed))
 
-        self._streams.remove(stream_to_be_removed)
+        self._remove_from_streams(stream_to_be_removed)
+        self._update_min_level()
 
         # NOTE: It is important to remove the TextIOWrapper because
         # it might be using a lot of memory even after the stream
         # is destroyed.
-        del stream_to_be_removed.stream
+        stream_to_be_removed._detach()
+
+    def stats(self) -> dict:
+        """Get the counters of the logger and of its streams.
+
+        accepted:       Records that were passed to the streams.
+        filtered:       Records dropped since no stream accepts the level.
+        suppressed:     Records dropped by the filters of the logger.
+        streams:        Dict of the name of every stream to its
+                        counters, check `OutputStream.stats`.
+        """
+        return {
+            "accepted": self._accepted,
+            "filtered": self._filtered,
+            "suppressed": self._suppressed,
+            "streams": {stream.stream_name: stream.stats()
+                        for stream in self._get_streams()},
+        }
+
+    def reset_stats(self, streams: bool = True):
+        """Set the counters of the logger back to zero, along with
+        the counters of its streams if streams is True."""
+        self._accepted = 0
+        self._filtered = 0
+        self._suppressed = 0
+
+        if streams:
+            for stream in self._get_streams():
+                stream.reset_stats()
+
+    def _flush_filters(self):
+        """Write the records that the filters of the logger are
+        holding back, like the counts of pending repeats."""
+        for record in _pending_records(self._filters):
+            for stream in self._get_streams():
+                stream.write(record)
+
+    def flush(self, timeout: float = None):
+        """Flush all the streams.
+
+        For asynchronous streams this waits till all the queued
+        records are written.
+        """
+        self._flush_filters()
+
+        for stream in self._get_streams():
+            stream.flush(timeout)
+
+    def close(self, timeout: float = None):
+        """Write all the pending records and stop the background
+        writers of the asynchronous streams.
+
+        This is automatically done when the interpreter exits.
+        """
+        self._flush_filters()
+
+        for stream in self._get_streams():
+            stream.close(timeout)
 
     def get_log_file(self):
         """Get the log file that is being written to.
@@ -332,16 +807,47 @@ class Logger(object):
         from the final master instance. We will have to get the file
         through the available streams.
         """
-        return [stream for stream in self._streams
-                if stream.stream_name not in Default().valid_stdout_names]
+        return [stream for stream in self._get_streams()
+                if stream.stream_name not in VALID_STDOUT_NAMES]
 
     def list_available_levels(self):
         """
         List all the available logger levels.
         """
-        for key in self._level_number:
+        for key in sorted(self._level_number, key=self._level_number.get):
             print("{} : {}".format(self._level_number[key], key.upper()))
 
+    @classmethod
+    def register_level(cls, name: str, number, color: str = "w"):
+        """
+        Register a new level and add a log method for it.
+
+        The method is named after the level in lowercase, so
+        registering `TRACE` adds `logger.trace(message, *args)`.
+        Check `simber.levels.register_level` for the params.
+
+        Registering a level that is already present with the same
+        number, for eg `INFO`, only updates its color.
+        """
+        if LEVEL_NAME.get(number) == name.upper():
+            register_level(name, number, color)
+            return
+
+        method_name = name.lower()
+        existing = getattr(cls, method_name,
+                           getattr(BoundLogger, method_name, None))
+
+        # Don't let a level shadow any other attribute of the logger
+        if method_name in ("name", "level") or (
+                existing is not None and
+                not hasattr(existing, "_simber_level")):
+            raise DuplicateLevel(name.upper(), number)
+
+        register_level(name, number, color)
+        setattr(cls, method_name, _make_log_method(method_name, number))
+        setattr(BoundLogger, method_name,
+                _make_log_method(method_name, number))
+
     def hold(self):
         """
         Hold the screen by using input()
@@ -351,53 +857,172 @@ class Logger(object):
         if LEVEL_NUMBER >= self.level:
             input("Screen hold! Press any key to continue")
 
-    def debug(self, message, *args):
+    def debug(self, message, *args, stacklevel: int = 1, **extra):
         """
         Add the message if the level is debug.
         """
         LEVEL_NUMBER = 0
-        self._write(message, args, LEVEL_NUMBER)
+        self._write(message, args, LEVEL_NUMBER, extra, stacklevel)
 
-    def info(self, message, *args):
+    def info(self, message, *args, stacklevel: int = 1, **extra):
         """
         Add the message if the level is info or less.
         """
         LEVEL_NUMBER = 1
-        self._write(message, args, LEVEL_NUMBER)
+        self._write(message, args, LEVEL_NUMBER, extra, stacklevel)
 
-    def warning(self, message, *args):
+    def warning(self, message, *args, stacklevel: int = 1, **extra):
         """
         Add the message if the level is warning or less.
         """
         LEVEL_NUMBER = 2
-        self._write(message, args, LEVEL_NUMBER)
+        self._write(message, args, LEVEL_NUMBER, extra, stacklevel)
 
-    def error(self, message, *args):
+    def error(self, message, *args, stacklevel: int = 1, **extra):
         """
         Add the message if the level is error or less.
         """
         LEVEL_NUMBER = 3
-        self._write(message, args, LEVEL_NUMBER)
+        self._write(message, args, LEVEL_NUMBER, extra, stacklevel)
 
-    def critical(self, message, *args, exit_code: int = -1):
+    def critical(self, message, *args, exit_code: int = -1,
+                 stacklevel: int = 1, **extra):
         """
         Add the message if the level is critical or less.
         """
         LEVEL_NUMBER = 4
-        self._write(message, args, LEVEL_NUMBER)
+        self._write(message, args, LEVEL_NUMBER, extra, stacklevel)
+
+        # Make sure nothing is lost in buffers before exiting
+        self.flush()
         exit(exit_code)
 
     @property
-    def level_map(self) -> Dict:
+    def level_map(self) -> dict:
         """
         Expose the map of level name strings to the level numbers.
         """
         return self._level_number
 
     @property
-    def streams(self) -> List[OutputStream]:
+    def streams(self) -> list:
         """
         Return all the streams attached to the
         logger.
         """
-        return list(self._streams)
+        return list(self._get_streams())
+
+    @property
+    def filters(self) -> tuple:
+        return self._filters
+
+    @property
+    def propagate(self) -> bool:
+        """
+        If the logger writes to the streams of the loggers above it.
+        """
+        return self._propagate
+
+    @propagate.setter
+    def propagate(self, value: bool):
+        self._propagate = value
+        OutputStream._revision += 1
+
+
+class BoundLogger(object):
+    """View of a logger that adds fields to every record it logs.
+
+    It is returned by `Logger.bind` and has the same log methods as
+    the logger. Everything else, like the streams and the level, is
+    taken from the logger, so creating one is cheap and it is not
+    kept anywhere once it is not used.
+
+    logger.bind(request_id=request.id).info("Handling the request")
+
+    The bound fields take precedence over the fields bound to the
+    context and the keyword arguments passed to the log methods take
+    precedence over both. The merged fields are kept and only merged
+    again once the fields of the context change.
+    """
+
+    __slots__ = ("_logger", "_fields", "_merged")
+
+    def __init__(self, logger: Logger, fields: dict):
+        self._logger = logger
+        self._fields = fields
+
+        # The context fields the merged fields were built from, along
+        # with the merged fields. Kept in one tuple so that threads
+        # never see the one without the other.
+        self._merged = (None, None)
+
+    @property
+    def logger(self) -> Logger:
+        return self._logger
+
+    @property
+    def fields(self) -> dict:
+        return dict(self._fields)
+
+    def __getattr__(self, name):
+        # Only the public attributes are taken from the logger
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return getattr(self._logger, name)
+
+    def bind(self, **fields) -> "BoundLogger":
+        """Get a view of the logger with the passed fields added to
+        the fields of this one."""
+        return BoundLogger(self._logger, {**self._fields, **fields})
+
+    def unbind(self, *names) -> "BoundLogger":
+        """Get a view of the logger without the passed fields."""
+        return BoundLogger(self._logger, {
+            name: value for name, value in self._fields.items()
+            if name not in names})
+
+    def _get_fields(self) -> dict:
+        """Get the bound fields merged with the fields of the
+        context."""
+        context = _context.get()
+        seen, merged = self._merged
+
+        if context is not seen:
+            merged = {**context, **self._fields} if context \
+                else self._fields
+            self._merged = (context, merged)
+
+        return merged
+
+    def _write(self, message, args, level, extra=None, stacklevel=1):
+        self._logger._write(message, args, level, extra, stacklevel + 1,
+                            self._get_fields())
+
+    debug = _make_log_method("debug", 0)
+    info = _make_log_method("info", 1)
+    warning = _make_log_method("warning", 2)
+    error = _make_log_method("error", 3)
+
+    def critical(self, message, *args, exit_code: int = -1,
+                 stacklevel: int = 1, **extra):
+        """
+        Add the message if the level is critical or less.
+        """
+        self._write(message, args, 4, extra, stacklevel)
+
+        self._logger.flush()
+        exit(exit_code)
+
+
+def _flush_filters_at_exit():
+    """Write the records that the filters of the loggers and their
+    streams are holding back before the streams are closed."""
+    for logger in list(Logger._instances):
+        logger._flush_filters()
+
+        for stream in logger._get_streams():
+            stream._flush_filters()
+
+
+atexit.register(_flush_filters_at_exit)
@@ -0,0 +1,114 @@
+"""Handle the messages passed to the log methods.
+
+The message is not built when the log method is called. It is
+kept along with the args and built only when a stream formats
+the record, and only once even if many streams write it.
+"""
+
+from collections.abc import Mapping
+from types import FunctionType
+
+
+class lazy(object):
+    """Wrap a function so that it is only called, with the passed
+    args, when the message is built.
+
+    logger.debug("Tree: %s", lazy(dump_tree, root))
+    """
+
+    __slots__ = ("_function", "_args", "_kwargs")
+
+    def __init__(self, function, *args, **kwargs):
+        self._function = function
+        self._args = args
+        self._kwargs = kwargs
+
+    def __call__(self):
+        return self._function(*self._args, **self._kwargs)
+
+
+def _takes_no_args(function: FunctionType) -> bool:
+    """Check if the function can be called without any arguments."""
+    code = function.__code__
+    required = code.co_argcount - len(function.__defaults__ or ())
+    keyword = code.co_kwonlyargcount - len(function.__kwdefaults__ or {})
+
+    return required <= 0 and keyword <= 0
+
+
+class Message(object):
+    """Hold the message and the args passed to a log method and
+    build the final string lazily.
+
+    The message is built in the following way
+
+    - Args that are `lazy` or functions that take no arguments, for
+      eg lambdas, are called to get their value. Any other callable,
+      like a method or a class, is used as it is. If the call fails,
+      the function itself is used.
+    - If the message contains a `%`, printf style formatting is
+      tried with the args, eg `logger.debug("x=%s", x)`.
+    - Else, or if that fails, the args are converted to strings
+      and appended to the message seperated by a space.
+    """
+
+    __slots__ = ("_message", "_args", "_rendered")
+
+    def __init__(self, message, args=()):
+        self._message = message
+        self._args = args
+        self._rendered = None
+
+    @property
+    def message(self):
+        return self._message
+
+    @property
+    def args(self) -> tuple:
+        return self._args
+
+    def _resolve(self, value):
+        """Call the value if it is a lazy callable."""
+        if isinstance(value, lazy) or (
+                isinstance(value, FunctionType) and _takes_no_args(value)):
+            try:
+                return value()
+            except Exception:
+                return value
+
+        return value
+
+    def render(self) -> str:
+        """Build the message string if not already built."""
+        if self._rendered is not None:
+            return self._rendered
+
+        message = str(self._resolve(self._message))
+        args = tuple(self._resolve(arg) for arg in self._args)
+
+        rendered = None
+        if args and "%" in message:
+            # Support `logger.debug("%(x)s", {"x": 1})` like logging
+            format_args = args[0] \
+                if len(args) == 1 and isinstance(args[0], Mapping) else args
+
+            try:
+                rendered = message % format_args
+            except (TypeError, ValueError, KeyError):
+                pass
+
+        if rendered is None:
+            rendered = message if not args else "{} {}".format(
+                message, " ".join(str(arg) for arg in args))
+
+        self._rendered = rendered
+        return rendered
+
+    def __str__(self):
+        return self.render()
+
+    def __format__(self, format_spec):
+        return format(self.render(), format_spec)
+
+    def __repr__(self):
+        return repr(self.render())
@@ -0,0 +1,307 @@
+"""Write the logs of many processes to the same files through one
+collector process.
+
+When many worker processes append to the same file, lines from
+different processes can get mixed up. The `LogCollector` runs a
+process that owns the files. Workers send it the formatted records
+over a Unix socket and the collector writes them in batches, one
+write per file for everything that is pending.
+
+If the collector can not be reached, the stream falls back to
+writing the file directly and tries to reconnect after a while.
+
+The collector appends to any path a worker sends, so the workers
+have to authenticate. By default the authkey of the current process
+is used, which `multiprocessing` generates at random and passes on
+to the processes it starts.
+"""
+
+import os
+import socket
+from multiprocessing import (
+    AuthenticationError, Event, Process, current_process
+)
+from multiprocessing.connection import Client, Listener, wait
+from shutil import rmtree
+from tempfile import mkdtemp
+from threading import Event as ThreadEvent, Lock, Thread
+from time import monotonic
+from weakref import WeakSet
+
+
+# Seperates the path of the file from the record in a message
+_SEPERATOR = b"\0"
+
+# Clients that need a new connection in a forked child
+_clients = WeakSet()
+
+
+def _get_authkey(authkey: bytes = None) -> bytes:
+    """Get the passed authkey or the one of the current process."""
+    if authkey is not None:
+        return authkey
+
+    # Copied into bytes since the authkey can not be pickled as it is
+    return bytes(current_process().authkey)
+
+
+def _accept(listener, connections, lock, closing):
+    """Accept the connections of the workers till the collector is
+    closing.
+
+    A worker that fails the handshake, for eg one with the wrong key,
+    is never listened to. Once `closing` is set, the first failed
+    handshake stops the thread, which is how `_wake` stops it after
+    all the workers that connected before are accepted.
+    """
+    while True:
+        try:
+            connection = listener.accept()
+        except (AuthenticationError, EOFError, ConnectionError):
+            if closing.is_set():
+                return
+
+            continue
+        except OSError:
+            return
+
+        with lock:
+            connections.append(connection)
+
+
+def _wake(address):
+    """Connect to the listener without a handshake so that the
+    accept thread stops once it gets to this connection."""
+    sock = socket.socket(socket.AF_UNIX)
+
+    try:
+        sock.connect(address)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+def _read(ready, connections, lock) -> dict:
+    """Read all the messages that are waiting on the ready
+    connections, by the path of the file.
+
+    The connections that reached EOF are closed and removed.
+    """
+    batches = {}
+
+    for connection in ready:
+        try:
+            while connection.poll():
+                message = connection.recv_bytes()
+                path, _, data = message.partition(_SEPERATOR)
+                batches.setdefault(path, []).append(data)
+        except (EOFError, OSError):
+            connection.close()
+            with lock:
+                connections.remove(connection)
+
+    return batches
+
+
+def _write_batches(batches, files):
+    """Write the pending data of every file with one write."""
+    for path, chunks in batches.items():
+        if path not in files:
+            files[path] = open(path, "ab", buffering=0)
+
+        files[path].write(b"".join(chunks))
+
+
+def _serve(address, authkey, stop_event):
+    """Run the collector till the stop event is set.
+
+    On stop, the accept thread is stopped first so that every worker
+    whose connection was accepted is known. Then everything left on
+    the connections is written till each of them reaches EOF. A
+    connection that stays idle is closed, anything it sent before
+    would already be waiting to be read.
+    """
+    listener = Listener(address, authkey=authkey)
+    connections = []
+    lock = Lock()
+    closing = ThreadEvent()
+    files = {}
+
+    acceptor = Thread(target=_accept,
+                      args=(listener, connections, lock, closing),
+                      daemon=True)
+    acceptor.start()
+
+    try:
+        while not stop_event.is_set():
+            with lock:
+                current = list(connections)
+
+            if not current:
+                stop_event.wait(0.1)
+                continue
+
+            _write_batches(_read(wait(current, timeout=0.1),
+                                 connections, lock), files)
+
+        closing.set()
+        _wake(address)
+        acceptor.join()
+        listener.close()
+
+        while connections:
+            ready = wait(list(connections), timeout=0.1)
+            if not ready:
+                break
+
+            _write_batches(_read(ready, connections, lock), files)
+    finally:
+        listener.close()
+        for connection in connections:
+            connection.close()
+        for file in files.values():
+            file.close()
+
+
+class LogCollector(object):
+    """Process that writes the records sent by the workers.
+
+    address:        Path of the Unix socket to listen on. A temporary
+                    path is used if it is not passed.
+    authkey:        Key that the workers need to connect. Defaults to
+                    the authkey of the current process, which the
+                    processes started by `multiprocessing` share.
+
+    Start the collector in the main process before starting the
+    workers and pass its `address` as the `collector` param of the
+    file streams or the `Logger`.
+    """
+
+    def __init__(self, address: str = None, authkey: bytes = None):
+        self._tempdir = None
+
+        if address is None:
+            self._tempdir = mkdtemp(prefix="simber-")
+            address = os.path.join(self._tempdir, "collector.sock")
+
+        self._address = address
+        self._authkey = _get_authkey(authkey)
+        self._stop_event = Event()
+        self._process = None
+
+    @property
+    def address(self) -> str:
+        return self._address
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """Start the collector process and wait till it is ready
+        to accept the workers."""
+        self._process = Process(
+            target=_serve,
+            args=(self._address, self._authkey, self._stop_event),
+            name="simber-collector",
+            daemon=True
+        )
+        self._process.start()
+
+        while not os.path.exists(self._address) and self.alive:
+            self._stop_event.wait(0.01)
+
+        return self
+
+    def stop(self, timeout: float = None):
+        """Write everything that is pending and stop the collector."""
+        if self._process is None:
+            return
+
+        self._stop_event.set()
+        self._process.join(timeout)
+        self._process = None
+
+        if self._tempdir is not None:
+            rmtree(self._tempdir, ignore_errors=True)
+
+
+class CollectorClient(object):
+    """Send formatted records of a worker to the collector.
+
+    One connection is made per process. If sending fails, the
+    client stops trying for `retry_interval` seconds so that the
+    records can be written directly in the meantime.
+
+    The authkey defaults to the one of the current process, it
+    should be the same as the one of the collector.
+    """
+
+    def __init__(self, address: str, authkey: bytes = None,
+                 retry_interval: float = 5.0):
+        self._address = address
+        self._authkey = _get_authkey(authkey)
+        self._retry_interval = retry_interval
+        self._retry_at = 0
+        self._lock = Lock()
+        self._connection = None
+
+        _clients.add(self)
+
+    @property
+    def address(self) -> str:
+        return self._address
+
+    def _reset(self):
+        """Forget the connection, for eg in a forked child which
+        should not share the connection of the parent."""
+        self._lock = Lock()
+        self._connection = None
+        self._retry_at = 0
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except OSError:
+                pass
+
+        self._connection = None
+        self._retry_at = monotonic() + self._retry_interval
+
+    def send(self, path: str, text: str) -> bool:
+        """Send the record to the collector.
+
+        Returns False if the collector could not be reached and
+        the record should be written directly.
+        """
+        if self._connection is None and monotonic() < self._retry_at:
+            return False
+
+        message = path.encode("utf-8") + _SEPERATOR + text.encode("utf-8")
+
+        with self._lock:
+            try:
+                if self._connection is None:
+                    self._connection = Client(self._address,
+                                              authkey=self._authkey)
+
+                self._connection.send_bytes(message)
+                return True
+            except (OSError, EOFError, ValueError, AuthenticationError):
+                self._disconnect()
+                return False
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+def _reset_clients():
+    for client in list(_clients):
+        client._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients)
@@ -0,0 +1,80 @@
+"""Define the record that is passed to the streams.
+
+One record is built for every log call that at least one stream
+accepts and the same record is passed to all the streams, so the
+caller details, the level name and the time are only found once.
+"""
+
+from simber.message import Message
+
+
+class LogRecord(object):
+    """Hold all the details of one log call.
+
+    levelno:        Number of the level of the record.
+    levelname:      Name of the level of the record.
+    name:           Name of the logger.
+    created:        Timestamp of the record.
+    filename:       Name of the file the record was logged from.
+    funcname:       Name of the function the record was logged from.
+    lineno:         Line number the record was logged from.
+    msg:            The `Message` passed to the log method.
+    extra:          Dict of the keyword arguments passed to the log
+                    method, along with the fields bound to the logger
+                    or to the context. It can be shared by many records
+                    so it should not be changed in place, use `copy`.
+
+    The frame of the caller is never stored in the record, only
+    the details needed from it are copied.
+    """
+
+    __slots__ = ("levelno", "levelname", "name", "created", "filename",
+                 "funcname", "lineno", "msg", "extra")
+
+    def __init__(
+        self,
+        levelno,
+        levelname: str,
+        name: str,
+        created: float,
+        msg: Message,
+        extra: dict = None,
+        filename: str = None,
+        funcname: str = None,
+        lineno: int = None
+    ):
+        self.levelno = levelno
+        self.levelname = levelname
+        self.name = name
+        self.created = created
+        self.msg = msg
+        self.extra = extra
+        self.filename = filename
+        self.funcname = funcname
+        self.lineno = lineno
+
+    @property
+    def message(self) -> str:
+        """Build the message, this is only done once."""
+        return self.msg.render()
+
+    def set_caller(self, frame):
+        """Copy the caller details from the passed frame."""
+        code = frame.f_code
+        self.filename = code.co_filename
+        self.funcname = code.co_name
+        self.lineno = frame.f_lineno
+
+    def copy(self, **changes):
+        """Get a copy of the record with the passed fields changed."""
+        record = LogRecord.__new__(LogRecord)
+
+        for field in self.__slots__:
+            setattr(record, field, changes.get(field, getattr(self, field)))
+
+        return record
+
+    def __repr__(self):
+        return "<LogRecord: {}, {}, {}:{}, {!r}>".format(
+            self.name, self.levelname, self.filename, self.lineno,
+            self.msg)
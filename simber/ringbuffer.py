@@ -0,0 +1,164 @@
+"""Keep the last records in memory and write them only when needed.
+
+Writing every DEBUG record to the disk is costly, but the DEBUG
+records right before an error are the most useful ones. The
+`RingBufferStream` keeps the last records without formatting them
+and writes them to another stream once an error is logged.
+"""
+
+from threading import Lock
+
+from simber.levels import LEVEL_NUMBER
+from simber.record import LogRecord
+from simber.sink import NullSink
+from simber.stream import OutputStream
+
+
+class RingBufferStream(OutputStream):
+    """Stream that keeps the last `capacity` records in memory.
+
+    target:         The `OutputStream` that the records are written to
+                    when they are dumped.
+    capacity:       Number of records to keep. Once the buffer is full,
+                    the oldest record is replaced.
+    level:          Minimum level of the records to keep. Defaults to
+                    DEBUG.
+    dump_level:     Records of this level and above dump the buffer,
+                    including themselves, to the target. Defaults to
+                    ERROR. Pass None to only dump on `dump()`.
+    disabled:       If the stream is disabled, no records are kept.
+
+    The records are kept as they are and only formatted by the target
+    when they are dumped, so keeping a record costs one slot of a list
+    that is allocated once. The buffer is emptied on every dump so that
+    the same records are not written twice. The records are written to
+    the target as any other stream is written, so the ones below the
+    level of the target are dropped and nothing is written if it is
+    disabled. To get the DEBUG records, the level of the target should
+    be DEBUG.
+
+    The target should not also be added to the logger, else the records
+    of its level and above are written to it twice, once when they are
+    logged and again on dump.
+
+    The messages are built when they are dumped, so the args passed to
+    the log methods are used as they are at that time.
+    """
+
+    def __init__(
+        self,
+        target: OutputStream,
+        capacity: int = 1000,
+        level: str = "DEBUG",
+        dump_level: str = "ERROR",
+        disabled: bool = False
+    ):
+        # The stream itself never writes, the target does
+        super().__init__(NullSink(), level, target.format, disabled,
+                         colors=target.colors)
+
+        self._target = target
+        self._capacity = capacity
+        self._records = [None] * capacity
+        self._index = 0
+        self._size = 0
+        self._lock = Lock()
+
+        self._dump_level = float("inf") if dump_level is None \
+            else LEVEL_NUMBER[dump_level]
+        self._identity = ("ring buffer", id(self))
+
+    @property
+    def stream_name(self) -> str:
+        return "<ring buffer of {}>".format(self._target.stream_name)
+
+    @property
+    def target(self) -> OutputStream:
+        return self._target
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def uses_caller(self) -> bool:
+        # The caller is needed if the target will show it
+        return self._target.uses_caller
+
+    def __len__(self):
+        return self._size
+
+    def write(self, record: LogRecord):
+        """Keep the record in the buffer and dump the buffer if the
+        record is of the dump level or above."""
+        if record.levelno < self._level:
+            self._filtered += 1
+            return False
+
+        if self._disabled:
+            self._disabled_count += 1
+            return False
+
+        with self._lock:
+            self._records[self._index] = record
+            self._index = (self._index + 1) % self._capacity
+            self._size = min(self._size + 1, self._capacity)
+
+        self._accepted += 1
+
+        if record.levelno >= self._dump_level:
+            self.dump()
+
+        return True
+
+    def records(self) -> list:
+        """Get the records in the buffer, oldest first."""
+        with self._lock:
+            return self._ordered()
+
+    def _ordered(self) -> list:
+        """Get the records oldest first, the lock should be held."""
+        start = (self._index - self._size) % self._capacity
+        return [self._records[(start + offset) % self._capacity]
+                for offset in range(self._size)]
+
+    def clear(self):
+        """Drop all the records in the buffer."""
+        with self._lock:
+            self._records = [None] * self._capacity
+            self._index = 0
+            self._size = 0
+
+    def dump(self) -> int:
+        """Write all the records in the buffer to the target and
+        empty the buffer.
+
+        Returns the number of records that the target wrote.
+        """
+        with self._lock:
+            records = self._ordered()
+            self._records = [None] * self._capacity
+            self._index = 0
+            self._size = 0
+
+        written = 0
+
+        for record in records:
+            if self._target.write(record):
+                written += 1
+
+        return written
+
+    def flush(self, timeout: float = None):
+        """Flush the target, the buffer is only written on dump."""
+        self._target.flush(timeout)
+
+    def close(self, timeout: float = None):
+        self._target.close(timeout)
+
+    def _detach(self):
+        """Drop the records and stop keeping new ones. The target is
+        left alone since it might be used by itself."""
+        self.clear()
+        self._disabled = True
+        OutputStream._revision += 1
@@ -0,0 +1,209 @@
+"""Rotate the log files written by the file streams.
+
+The `Rotator` keeps a count of the bytes written to the file
+so that checking if the file needs to be rotated does not need
+a `stat()` for every record. Rotated files are renamed with the
+time of the rotation appended to the name and can optionally be
+compressed with gzip on a background thread.
+"""
+
+import os
+import re
+from datetime import datetime
+from queue import Queue
+from threading import Lock, Thread
+from time import monotonic
+
+
+class Rotator(object):
+    """Decide when a log file needs to be rotated and rotate it.
+
+    path:           Path of the log file.
+    max_bytes:      Rotate the file once it is about to grow beyond
+                    this size. 0 disables size based rotation.
+    interval:       Rotate the file every `interval` seconds. 0
+                    disables time based rotation.
+    backup_count:   Number of rotated files to keep. Older ones are
+                    deleted. 0 keeps all of them.
+    compress:       If to gzip the rotated files.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 0,
+        interval: float = 0,
+        backup_count: int = 5,
+        compress: bool = False
+    ):
+        self._path = os.path.abspath(path)
+        self._max_bytes = max_bytes
+        self._interval = interval
+        self._backup_count = backup_count
+        self._compress = compress
+
+        self._size = os.path.getsize(self._path) \
+            if os.path.exists(self._path) else 0
+        self._rollover_at = monotonic() + interval if interval else None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def should_rotate(self, nbytes: int) -> bool:
+        """Check if the file should be rotated before writing
+        `nbytes` more bytes to it.
+
+        The bytes are added to the tracked size of the file.
+        """
+        rotate = False
+
+        if self._max_bytes and self._size and \
+                self._size + nbytes > self._max_bytes:
+            rotate = True
+        elif self._rollover_at is not None and \
+                monotonic() >= self._rollover_at:
+            rotate = True
+
+        if rotate:
+            self._size = nbytes
+        else:
+            self._size += nbytes
+
+        return rotate
+
+    def _backup_name(self) -> str:
+        """Get a name for the rotated file that is not already
+        taken."""
+        base = "{}.{}".format(self._path,
+                              datetime.now().strftime("%Y%m%d-%H%M%S"))
+        name = base
+        count = 0
+
+        while os.path.exists(name) or os.path.exists(name + ".gz"):
+            count += 1
+            name = "{}.{}".format(base, count)
+
+        return name
+
+    def _list_backups(self):
+        """List the rotated files of the log file, oldest first.
+
+        Only the files named like `_backup_name` names them are
+        considered, so other files starting with the name of the
+        log file are left alone. A file that is still being
+        compressed is only counted once.
+        """
+        directory, filename = os.path.split(self._path)
+        pattern = re.compile(
+            re.escape(filename) + r"\.(\d{8}-\d{6})(?:\.(\d+))?(?:\.gz)?$")
+
+        backups = {}
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match is None:
+                continue
+
+            if name.endswith(".gz"):
+                name = name[:-3]
+
+            # Sort by the time and then by the count, as a number
+            backups[os.path.join(directory, name)] = \
+                (match.group(1), int(match.group(2) or 0))
+
+        return sorted(backups, key=backups.get)
+
+    def _remove_old_backups(self):
+        """Remove the oldest backups if there are more than
+        `backup_count` of them."""
+        if not self._backup_count:
+            return
+
+        backups = self._list_backups()
+
+        for backup in backups[:-self._backup_count]:
+            for name in (backup, backup + ".gz"):
+                try:
+                    os.remove(name)
+                except FileNotFoundError:
+                    pass
+
+    def rotate(self):
+        """Move the current file out of the way.
+
+        The caller is responsible for closing the file before
+        and opening it again after this.
+        """
+        if self._interval:
+            self._rollover_at = monotonic() + self._interval
+
+        if not os.path.exists(self._path):
+            return
+
+        backup = self._backup_name()
+        os.rename(self._path, backup)
+
+        if self._compress:
+            _compressor.submit(backup, self._remove_old_backups)
+        else:
+            self._remove_old_backups()
+
+
+class _Compressor(object):
+    """Compress rotated files on a background thread so that
+    logging never waits for it."""
+
+    def __init__(self):
+        self._queue = Queue()
+        self._thread = None
+        self._lock = Lock()
+
+    def _start(self):
+        """Start the thread if it is not already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+
+            self._thread = Thread(target=self._run,
+                                  name="simber-compressor", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            path, callback = self._queue.get()
+
+            try:
+                self._compress(path)
+                callback()
+            except OSError:
+                pass
+            finally:
+                self._queue.task_done()
+
+    def _compress(self, path):
+        """Compress the file and remove the original."""
+        import gzip
+        import shutil
+
+        with open(path, "rb") as source, \
+                gzip.open(path + ".gz", "wb") as destination:
+            shutil.copyfileobj(source, destination)
+
+        os.remove(path)
+
+    def submit(self, path, callback):
+        """Compress the passed file and call the callback once
+        done."""
+        self._start()
+        self._queue.put((path, callback))
+
+    def join(self):
+        """Wait till all the submitted files are compressed."""
+        self._queue.join()
+
+
+_compressor = _Compressor()
@@ -0,0 +1,139 @@
+"""Handle the objects that the streams can write to.
+
+A sink is any object with a `write` method. It can either accept
+`str`, like files opened in text mode or `io.StringIO`, or `bytes`,
+like files opened in binary mode, `socket.makefile("wb")` or
+memory mapped files. Sinks can optionally have the following
+
+flush:      Called when the stream is flushed.
+close:      Called when the sink is closed by its owner.
+name:       Name of the sink. Sinks with a path as the name are
+            considered files and can be rotated, appended to
+            atomically and written through a collector.
+fileno:     File descriptor of the sink, used to write buffered
+            records with one system call.
+binary:     If the sink accepts bytes, when it can not be found
+            out from the type or the mode of the sink.
+
+Raw file descriptors and sockets are wrapped in a sink.
+"""
+
+import io
+import os
+import sys
+from mmap import mmap
+
+
+class FdSink(object):
+    """Write to a raw file descriptor.
+
+    The fd is not closed by the sink unless `close` is called.
+    """
+
+    binary = True
+
+    def __init__(self, fd: int):
+        self._fd = fd
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def write(self, data: bytes) -> int:
+        """Write all the data to the fd."""
+        view = memoryview(data)
+
+        while view:
+            view = view[os.write(self._fd, view):]
+
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        os.close(self._fd)
+
+
+class SocketSink(object):
+    """Write to a connected socket."""
+
+    binary = True
+
+    def __init__(self, sock):
+        self._socket = sock
+
+    def fileno(self) -> int:
+        return self._socket.fileno()
+
+    def write(self, data: bytes) -> int:
+        self._socket.sendall(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self._socket.close()
+
+
+class NullSink(object):
+    """Drop everything written to it. Used by the streams that do not
+    write anything themselves, like the ring buffer."""
+
+    binary = False
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def make_sink(stream):
+    """Get the sink for the passed object.
+
+    Returns None if the object can not be written to.
+    """
+    if isinstance(stream, int) and not isinstance(stream, bool):
+        return FdSink(stream)
+
+    # If socket was never imported, the stream can not be a socket
+    socket = sys.modules.get("socket")
+    if socket is not None and isinstance(stream, socket.socket):
+        return SocketSink(stream)
+
+    if callable(getattr(stream, "write", None)):
+        return stream
+
+    return None
+
+
+def is_binary(sink) -> bool:
+    """Check if the sink accepts bytes instead of str."""
+    if isinstance(sink, io.TextIOBase):
+        return False
+
+    if isinstance(sink, (io.RawIOBase, io.BufferedIOBase, mmap)):
+        return True
+
+    binary = getattr(sink, "binary", None)
+    if binary is not None:
+        return binary
+
+    return "b" in getattr(sink, "mode", "")
+
+
+def get_fileno(sink):
+    """Get the file descriptor of the sink, None if it has none."""
+    try:
+        return sink.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def flush_sink(sink):
+    """Flush the sink if it can be flushed."""
+    flush = getattr(sink, "flush", None)
+
+    if flush is not None:
+        flush()
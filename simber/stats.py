@@ -0,0 +1,106 @@
+"""Keep the numbers that show how much time is spent logging.
+
+The counters of the streams and the loggers are plain integers that
+are increased on the write path. The `Histogram` keeps the spread of
+the time taken to format and to write the records, it is only used
+if `timing` is passed to the stream since reading the clock twice
+per record is not free.
+
+The counters are not locked, so if many threads log at once a few
+counts can be lost. They are meant to spot trends, not to account
+for every record.
+"""
+
+from math import ceil
+
+
+# Number of bits used for the linear buckets within every power of 2.
+# With 3 bits the value of a bucket is at most 12.5% off.
+_SUB_BITS = 3
+_SUB_COUNT = 1 << _SUB_BITS
+
+
+def _bucket(value: int) -> int:
+    """Get the index of the bucket for the value."""
+    if value < _SUB_COUNT:
+        return value
+
+    shift = value.bit_length() - _SUB_BITS - 1
+    return (shift << _SUB_BITS) + (value >> shift)
+
+
+def _bucket_limit(index: int) -> int:
+    """Get the highest value that falls in the bucket."""
+    if index < 2 * _SUB_COUNT:
+        return index
+
+    shift = (index >> _SUB_BITS) - 1
+    top = (index & (_SUB_COUNT - 1)) + _SUB_COUNT
+
+    return ((top + 1) << shift) - 1
+
+
+class Histogram(object):
+    """Keep the spread of values, for eg durations in ns, in buckets
+    that grow with the value like an HDR histogram.
+
+    Recording a value is O(1) and the memory used only depends on
+    the range of the values, not on how many are recorded.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget all the recorded values."""
+        self._counts = {}
+        self._count = 0
+        self._total = 0
+        self._min = None
+        self._max = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def record(self, value: int):
+        """Add the value to the histogram."""
+        index = _bucket(value)
+        self._counts[index] = self._counts.get(index, 0) + 1
+        self._count += 1
+        self._total += value
+
+        if value > self._max:
+            self._max = value
+        if self._min is None or value < self._min:
+            self._min = value
+
+    def percentile(self, percent: float) -> int:
+        """Get the value that `percent` percent of the values are
+        below or equal to, within the precision of the buckets."""
+        if not self._count:
+            return 0
+
+        target = max(ceil(self._count * percent / 100), 1)
+        seen = 0
+
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+
+            if seen >= target:
+                return min(_bucket_limit(index), self._max)
+
+        return self._max
+
+    def to_dict(self) -> dict:
+        """Get the summary of the histogram."""
+        return {
+            "count": self._count,
+            "min": self._min or 0,
+            "max": self._max,
+            "mean": self._total / self._count if self._count else 0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+        }
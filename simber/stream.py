@@ -1,10 +1,48 @@
 """Handle output streams of the logger."""
 
-from _io import TextIOWrapper
+import atexit
+import os
+from threading import Lock, Timer
+from time import perf_counter
+from weakref import WeakSet
 
-from simber.configurations import Default
-from simber.exceptions import InvalidLevel, InvalidStream
-from simber.formatter import Formatter
+from simber.configurations import Default, VALID_STDOUT_NAMES
+from simber.exceptions import (
+    InvalidCollectorOptions, InvalidLevel, InvalidStream
+)
+from simber.filters import _pending_records, _run_filters, _uses_caller
+from simber.colors import init_console
+from simber.formatter import Formatter, FormatTemplate
+from simber.levels import LEVEL_NUMBER
+from simber.record import LogRecord
+from simber.sink import flush_sink, get_fileno, is_binary, make_sink
+from simber.stats import Histogram
+from simber.writer import AsyncWriter, BLOCK
+
+
+# Records of this level or above are flushed right away
+# from the buffer of the stream
+FLUSH_LEVEL = LEVEL_NUMBER["ERROR"]
+
+# Streams that hold records in a buffer, used to write them on exit
+_buffered_streams = WeakSet()
+
+# str.isascii is only present in Python 3.7 and above
+_has_isascii = hasattr(str, "isascii")
+
+
+def _count_bytes(text: str, encoding: str) -> int:
+    """Get the number of bytes the text takes once encoded, without
+    encoding it if it is ASCII."""
+    if _has_isascii and text.isascii():
+        return len(text)
+
+    return len(text.encode(encoding))
+
+
+def _elapsed_ns(start: float) -> int:
+    """Get the ns passed since `start`, a `perf_counter()` time."""
+    return int((perf_counter() - start) * 1e9)
 
 
 class OutputStream(object):
@@ -14,26 +52,295 @@ class OutputStream(object):
 
     level:          The minimum level the stream will output in.
     format:         The format in which the stream will output in.
-    stream:         The stream itself. It can be an TextIOWrapper
-                    object that will have a write method which will
-                    be used to write to it.
+    stream:         The stream itself. It can be any object with a
+                    write method that accepts either str or bytes,
+                    for eg a file, `io.StringIO` or a memory mapped
+                    file, or a raw file descriptor or a socket.
+                    Check `simber.sink`.
     disabled:       If the stream is disabled or not.
+
+    If `asynchronous` is passed as True, the records are formatted
+    in the calling thread but written by a background thread. The
+    `queue_size` and `overflow` params control the queue of records
+    waiting to be written, check `simber.writer.AsyncWriter`.
+
+    If `buffer_size` is passed for a file stream, the encoded
+    records are kept in a buffer and written with a single
+    system call once the buffer has `buffer_size` bytes or the
+    oldest record has been waiting for `flush_interval` seconds.
+    Records of level ERROR and above are flushed right away.
+
+    If `max_bytes` or `rotate_interval` is passed for a file stream,
+    the file is rotated once it grows beyond `max_bytes` or every
+    `rotate_interval` seconds, keeping `backup_count` rotated files.
+    If `compress` is True, the rotated files are gzipped on a
+    background thread. Check `simber.rotation.Rotator`.
+
+    If `collector` is passed for a file stream, it should be the
+    address of a running `simber.multiprocess.LogCollector`. The
+    records are then sent to the collector which writes them, and
+    are only written directly if the collector can not be reached.
+    The collector writes the file as it gets the records, so it can
+    not be used along with rotation or a buffer, passing any of
+    `max_bytes`, `rotate_interval` or `buffer_size` with it raises
+    `InvalidCollectorOptions`.
+
+    If `atomic_append` is True for a file stream, the file is opened
+    again in append mode and every record, or every batch of records
+    if the stream is buffered, is written with one `os.write` of the
+    encoded bytes. Appends from many processes to the same file then
+    never get mixed up in the middle of a line.
+
+    `filters` is a list of filters that are run for every record that
+    passes the level check, check `simber.filters`.
+
+    The color codes in the format are only used if `colors` is True.
+    By default, they are used if the stream is the console of a
+    terminal and removed from the format otherwise, for eg for files.
+
+    The stream counts the records it wrote and dropped, the bytes it
+    wrote and the errors while writing, check `stats()`. If `timing`
+    is True, the time taken to format and to write every record is
+    also kept in histograms.
     """
 
+    # Bumped whenever the level or the disabled state of any stream
+    # changes so that loggers know when to recompute their cached
+    # effective minimum level.
+    _revision = 0
+
     def __init__(
         self,
-        stream: TextIOWrapper,
+        stream,
         level: str = None,
         format: str = None,
         disabled: bool = False,
-        time_format: str = None
+        time_format: str = None,
+        asynchronous: bool = False,
+        queue_size: int = 10000,
+        overflow: str = BLOCK,
+        buffer_size: int = 0,
+        flush_interval: float = 1.0,
+        max_bytes: int = 0,
+        rotate_interval: float = 0,
+        backup_count: int = 5,
+        compress: bool = False,
+        collector: str = None,
+        atomic_append: bool = False,
+        filters: list = None,
+        timing: bool = False,
+        colors: bool = None
     ):
+        if collector is not None:
+            self._check_collector_options(buffer_size, max_bytes,
+                                          rotate_interval)
+
         self._passed_level = None
+        self._init_stats(timing)
+        self._filters = tuple(filters or ())
+        self._write_lock = Lock()
+        self._detached = False
         self.stream = self._extract_stream(stream)
+        self._init_identity()
+        self._colors = self._is_tty() if colors is None else colors
+        if self._colors and self._is_console:
+            init_console()
         self._level = self._extract_level(level)
-        self._format = Default().file_format if format is None else format
+        self.format = Default().file_format if format is None else format
         self._disabled = disabled
         self._time_format = time_format
+        self._init_fd(atomic_append)
+        self._init_buffer(buffer_size, flush_interval)
+        self._init_rotation(max_bytes, rotate_interval, backup_count,
+                            compress)
+        self._collector = None
+        if collector is not None and self._path is not None:
+            # Imported here since multiprocessing is slow to import
+            from simber.multiprocess import CollectorClient
+
+            self._collector = CollectorClient(collector)
+            self._collector_path = os.path.abspath(self._path)
+        self._writer = AsyncWriter(self._emit, queue_size, overflow,
+                                   flush=self._flush_buffer) \
+            if asynchronous else None
+
+    def _check_collector_options(self, buffer_size: int, max_bytes: int,
+                                 rotate_interval: float):
+        """Make sure that the options passed along with a collector
+        can be used with it.
+
+        The records that reach the collector are written by it, so the
+        stream would never rotate or buffer them.
+        """
+        passed = [name for name, value in (("buffer_size", buffer_size),
+                                           ("max_bytes", max_bytes),
+                                           ("rotate_interval",
+                                            rotate_interval))
+                  if value]
+
+        if passed:
+            raise InvalidCollectorOptions(passed)
+
+    def _is_tty(self) -> bool:
+        """Check if the stream is the console of a terminal, the
+        colors are removed from the format otherwise."""
+        if not self._is_console:
+            return False
+
+        try:
+            return self.stream.isatty()
+        except (AttributeError, OSError, ValueError):
+            return False
+
+    def _init_stats(self, timing: bool):
+        """Initialize the counters of the stream and the histograms
+        if timing is True."""
+        self._timing = timing
+        self._format_time = Histogram() if timing else None
+        self._write_time = Histogram() if timing else None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Set all the counters and the histograms back to zero."""
+        self._accepted = 0
+        self._filtered = 0
+        self._disabled_count = 0
+        self._suppressed = 0
+        self._bytes_written = 0
+        self._errors = 0
+
+        if self._timing:
+            self._format_time.reset()
+            self._write_time.reset()
+
+    def stats(self) -> dict:
+        """Get the counters of the stream.
+
+        accepted:       Records that were written or queued.
+        filtered:       Records dropped because of the level.
+        disabled:       Records dropped because the stream is disabled.
+        suppressed:     Records dropped by the filters.
+        dropped:        Records dropped because the queue of the
+                        asynchronous writer was full.
+        bytes_written:  Bytes passed to the underlying stream.
+        errors:         Records that could not be written.
+
+        If timing is enabled, `format_ns` and `write_ns` have the
+        summary of the time taken to format and to write the
+        records.
+        """
+        stats = {
+            "accepted": self._accepted,
+            "filtered": self._filtered,
+            "disabled": self._disabled_count,
+            "suppressed": self._suppressed,
+            "dropped": self.dropped,
+            "bytes_written": self._bytes_written,
+            "errors": self._errors,
+        }
+
+        if self._timing:
+            stats["format_ns"] = self._format_time.to_dict()
+            stats["write_ns"] = self._write_time.to_dict()
+
+        return stats
+
+    def _init_identity(self):
+        """Find the name of the stream and what makes it unique.
+
+        Streams with a path as the name are files and are equal
+        if they write to the same file. The standard outputs are
+        equal if they have the same name. Any other stream, for eg
+        one without a name, is only equal to a stream writing to
+        the same object.
+        """
+        name = getattr(self.stream, "name", None)
+
+        self._binary = is_binary(self.stream)
+        self._is_console = name in VALID_STDOUT_NAMES
+        self._path = name if isinstance(name, str) and \
+            not self._is_console else None
+
+        if self._is_console:
+            self._identity = ("console", name)
+        elif self._path is not None:
+            self._identity = ("file", os.path.abspath(self._path))
+        else:
+            self._identity = ("object", id(self.stream))
+
+        self._stream_name = str(name) if name is not None else \
+            "<{} at {:#x}>".format(type(self.stream).__name__,
+                                   id(self.stream))
+
+    def _init_fd(self, atomic_append: bool):
+        """Initialize the file descriptor that encoded records are
+        written to.
+
+        If atomic_append is True, the file is opened again with
+        O_APPEND and unbuffered so that every write is one system
+        call. Else the fd of the stream is used, if needed.
+        """
+        self._fd = None
+        self._fd_file = None
+        self._atomic_append = atomic_append and self._path is not None
+        self._encoding = getattr(self.stream, "encoding", None) or "utf-8"
+
+        if self._is_console:
+            return
+
+        if self._atomic_append:
+            self._open_fd()
+
+    def _open_fd(self):
+        """Open the file of the stream in append mode, the file
+        object is kept so that the fd is closed with the stream."""
+        # Anything already written through the text layer should
+        # reach the file before we start writing to the fd.
+        flush_sink(self.stream)
+        self._fd_file = open(self._path, "ab", buffering=0)
+        self._fd = self._fd_file.fileno()
+
+    def _init_buffer(self, buffer_size: int, flush_interval: float):
+        """Initialize the write buffer of the stream.
+
+        Buffering is only used for file streams, the standard
+        outputs are always written right away.
+        """
+        self._buffer = None
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+        self._buffer_lock = Lock()
+        self._flush_timer = None
+
+        if not buffer_size or self._is_console:
+            return
+
+        if self._fd is None:
+            # Anything already written through the text layer should
+            # reach the file before we start writing to the fd. Sinks
+            # without an fd are written the whole buffer at once.
+            flush_sink(self.stream)
+            self._fd = get_fileno(self.stream)
+
+        self._buffer = bytearray()
+        _buffered_streams.add(self)
+
+    def _init_rotation(self, max_bytes: int, rotate_interval: float,
+                       backup_count: int, compress: bool):
+        """Initialize the rotation of the file of the stream.
+
+        Rotation is only used for file streams and only if either
+        of max_bytes or rotate_interval is passed.
+        """
+        self._rotator = None
+
+        if not (max_bytes or rotate_interval) or self._path is None:
+            return
+
+        from simber.rotation import Rotator
+
+        self._rotator = Rotator(self._path, max_bytes,
+                                rotate_interval, backup_count, compress)
 
     def _extract_level(self, passed_level: str):
         """Extract the passed level.
@@ -42,7 +349,7 @@ class OutputStream(object):
         default level. Else, make sure that the passed level
         is valid and accordingly return the level in int.
         """
-        level_map = Default().level_number
+        level_map = LEVEL_NUMBER
 
         # If level is not passed
         if passed_level is None:
@@ -55,24 +362,25 @@ class OutputStream(object):
         self._passed_level = passed_level
         return level_map[passed_level]
 
-    def _extract_stream(self, passed_stream: TextIOWrapper):
+    def _extract_stream(self, passed_stream):
         """Extract the passed stream.
 
-        If the passed stream is not a valid one, raise an exception,
-        else, just return it.
+        If the passed stream can not be written to, raise an
+        exception, else, return the sink for it.
         """
-        if not isinstance(passed_stream, TextIOWrapper):
+        sink = make_sink(passed_stream)
+
+        if sink is None:
             raise InvalidStream(type(passed_stream))
 
-        return passed_stream
+        return sink
 
-    def _make_format(self, message, level, frame, name):
+    def _make_format(self, record: LogRecord):
         """
         Make the format of the string that is to be written.
         """
-        _format = Formatter().sub(self._format,
-                                  level, name, frame, message,
-                                  time_format=self._time_format)
+        _format = self._template.render(record,
+                                        time_format=self._time_format)
 
         return _format + '\n'
 
@@ -83,6 +391,7 @@ class OutputStream(object):
     @level.setter
     def level(self, new_level: int):
         self._level = new_level
+        OutputStream._revision += 1
 
     @property
     def format(self) -> str:
@@ -91,6 +400,47 @@ class OutputStream(object):
     @format.setter
     def format(self, new_format: str):
         self._format = new_format
+        self._template = Formatter().compile(new_format, self._colors)
+        OutputStream._revision += 1
+
+    @property
+    def template(self) -> FormatTemplate:
+        return self._template
+
+    @property
+    def colors(self) -> bool:
+        return self._colors
+
+    @colors.setter
+    def colors(self, value: bool):
+        self._colors = value
+        if value and self._is_console:
+            init_console()
+
+        self.format = self._format
+
+    @property
+    def uses_caller(self) -> bool:
+        """If the stream needs the details of the caller, the logger
+        skips finding them if none of the streams need them."""
+        return self._template.uses_caller or \
+            any(_uses_caller(filter_) for filter_ in self._filters)
+
+    @property
+    def filters(self) -> tuple:
+        return self._filters
+
+    def add_filter(self, filter_):
+        """Add a filter that is run for every record of the stream.
+        Check `simber.filters` for the available filters."""
+        self._filters = self._filters + (filter_,)
+        OutputStream._revision += 1
+
+    def remove_filter(self, filter_):
+        """Remove the passed filter from the stream."""
+        self._filters = tuple(present for present in self._filters
+                              if present is not filter_)
+        OutputStream._revision += 1
 
     @property
     def disabled(self) -> bool:
@@ -99,41 +449,331 @@ class OutputStream(object):
     @disabled.setter
     def disabled(self, new_value: bool):
         self._disabled = new_value
+        OutputStream._revision += 1
+
+    @property
+    def buffered(self) -> bool:
+        return self._buffer is not None
+
+    @property
+    def asynchronous(self) -> bool:
+        return self._writer is not None
+
+    @property
+    def dropped(self) -> int:
+        """Number of records dropped because the queue of the
+        asynchronous writer was full."""
+        return self._writer.dropped if self._writer is not None else 0
 
     @property
-    def stream_name(self):
-        return self.stream.name
+    def stream_name(self) -> str:
+        return self._stream_name
 
     def __eq__(self, value):
         # If passed value is another object, we need to
-        # compare the names
+        # compare what the streams write to
         if isinstance(value, OutputStream):
-            return self.stream_name == value.stream_name
+            return self._identity == value._identity
 
         # Else false
         return False
 
     def __hash__(self):
-        return hash(self.stream_name)
+        return hash(self._identity)
 
     def __repr__(self):
         return self.stream_name
 
-    def write(self, message, calling_level, frame, logger_name):
-        """Write the message to the stream by making sure
-        the calling level is above or equal to the level
+    def write(self, record: LogRecord):
+        """Write the record to the stream by making sure
+        the level of the record is above or equal to the level
         """
-        if calling_level < self._level or self._disabled:
+        if record.levelno < self._level:
+            self._filtered += 1
             return False
 
-        _formatted_out = self._make_format(
-            message, calling_level, frame, logger_name
-        )
+        if self._disabled:
+            self._disabled_count += 1
+            return False
+
+        return self._write_record(record)
+
+    def _write_record(self, record: LogRecord):
+        """Filter, format and write the record without checking
+        the level."""
+        if self._filters:
+            record = _run_filters(self._filters, record)
+
+            if record is None:
+                self._suppressed += 1
+                return False
+
+            if type(record) is tuple:
+                for each in record:
+                    self._write_filtered(each)
+
+                return True
+
+        return self._write_filtered(record)
 
-        params = {"end": ""}
-        if self.stream.name not in Default().valid_stdout_names:
-            # Add the stream since it won't be stdout
-            params["file"] = self.stream
+    def _write_filtered(self, record: LogRecord):
+        """Format and write the record that passed the filters."""
+        if self._timing:
+            start = perf_counter()
+            _formatted_out = self._make_format(record)
+            self._format_time.record(_elapsed_ns(start))
+        else:
+            _formatted_out = self._make_format(record)
+
+        self._accepted += 1
+
+        flush = self._buffer is not None and record.levelno >= FLUSH_LEVEL
+
+        if self._writer is not None:
+            self._writer.put(_formatted_out, flush)
+        else:
+            self._emit(_formatted_out)
+
+            if flush:
+                self._flush_buffer()
 
-        print(_formatted_out, **params)
         return True
+
+    def _emit(self, formatted_out: str):
+        """Write the already formatted string to the stream.
+
+        Only one thread writes to the stream at a time so that lines
+        are never mixed up.
+        """
+        with self._write_lock:
+            if self._detached:
+                return
+
+            start = perf_counter() if self._timing else 0
+
+            try:
+                nbytes = self._emit_locked(formatted_out)
+            except Exception:
+                self._errors += 1
+                raise
+
+            if self._timing:
+                self._write_time.record(_elapsed_ns(start))
+
+            self._bytes_written += nbytes
+
+    def _emit_locked(self, formatted_out: str) -> int:
+        """Write the string, the write lock should be held.
+
+        Returns the number of bytes written.
+        """
+        if self._collector is not None and \
+                self._collector.send(self._collector_path, formatted_out):
+            return _count_bytes(formatted_out, self._encoding)
+
+        if self._buffer is not None:
+            return self._write_buffered(formatted_out)
+
+        if self._atomic_append:
+            data = formatted_out.encode(self._encoding)
+
+            if self._rotator is not None and \
+                    self._rotator.should_rotate(len(data)):
+                self._rotate()
+
+            self._write_fd(data)
+            return len(data)
+
+        if self._binary:
+            data = formatted_out.encode(self._encoding)
+            nbytes = len(data)
+        else:
+            nbytes = _count_bytes(formatted_out, self._encoding)
+
+        if self._rotator is not None and \
+                self._rotator.should_rotate(nbytes):
+            self._rotate()
+
+        if self._is_console:
+            print(formatted_out, end="")
+        elif self._binary:
+            self.stream.write(data)
+        else:
+            self.stream.write(formatted_out)
+
+        return nbytes
+
+    def _write_buffered(self, formatted_out: str) -> int:
+        """Add the passed string to the buffer and write the buffer
+        if it is full.
+
+        If the buffer is not full, make sure a timer is running
+        that will write it after the flush interval.
+
+        Returns the number of bytes added to the buffer.
+        """
+        data = formatted_out.encode(self._encoding)
+
+        with self._buffer_lock:
+            self._buffer += data
+
+            if len(self._buffer) >= self._buffer_size:
+                self._write_buffer()
+                return len(data)
+
+            if self._flush_timer is None or \
+                    not self._flush_timer.is_alive():
+                self._flush_timer = Timer(self._flush_interval,
+                                          self._flush_buffer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+        return len(data)
+
+    def _write_buffer(self):
+        """Write the whole buffer to the file with as few system
+        calls as possible.
+
+        The write lock and the buffer lock should be held while
+        calling this.
+        """
+        if not self._buffer:
+            return
+
+        if self._rotator is not None and \
+                self._rotator.should_rotate(len(self._buffer)):
+            self._rotate()
+
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._write_fd(data)
+
+    def _write_fd(self, data: bytes):
+        """Write the data to the fd of the stream.
+
+        One call to `os.write` writes everything unless the disk is
+        full or the call is interrupted, in which case the rest is
+        written with more calls. Sinks without an fd are written
+        with one call to their write method.
+        """
+        if self._fd is None:
+            self.stream.write(data if self._binary
+                              else data.decode(self._encoding))
+            return
+
+        data = memoryview(data)
+
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+
+    def _rotate(self):
+        """Rotate the file of the stream and start writing to a
+        new file at the same path."""
+        # Keep the same path so that the hash of the stream does
+        # not change.
+        self.stream.close()
+
+        self._rotator.rotate()
+
+        if self._binary:
+            self.stream = open(self._path, "ab")
+        else:
+            self.stream = open(self._path, "a", encoding=self._encoding)
+        if self._atomic_append:
+            self._fd_file.close()
+            self._open_fd()
+        elif self._buffer is not None:
+            self._fd = self.stream.fileno()
+
+    def _flush_buffer(self):
+        """Write the buffer of the stream, if there is one.
+
+        This is also called from the flush timer, so the write lock
+        is taken in case the file is rotated while writing it.
+        """
+        if self._buffer is None:
+            return
+
+        with self._write_lock, self._buffer_lock:
+            if self._detached:
+                return
+
+            self._write_buffer()
+
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+    def _flush_filters(self):
+        """Write the records that the filters are holding back, like
+        the counts of pending repeats."""
+        if self._detached or self._disabled:
+            return
+
+        for record in _pending_records(self._filters):
+            self._write_filtered(record)
+
+    def flush(self, timeout: float = None):
+        """Flush the stream.
+
+        If the stream is asynchronous, this waits till all the
+        queued records are written. Nothing is done once the
+        stream is removed from the logger.
+        """
+        if self._detached:
+            return
+
+        self._flush_filters()
+
+        if self._writer is not None:
+            self._writer.flush(timeout)
+
+        self._flush_buffer()
+        flush_sink(self.stream)
+
+    def _detach(self):
+        """Write everything pending and let go of the underlying
+        stream.
+
+        Any thread still holding the stream will not be able to
+        write to it anymore.
+        """
+        self.close()
+
+        with self._write_lock:
+            self._disabled = True
+            self._detached = True
+            OutputStream._revision += 1
+            del self.stream
+
+        _buffered_streams.discard(self)
+
+    def close(self, timeout: float = None):
+        """Write all the pending records and stop the asynchronous
+        writer, if any.
+
+        The underlying stream is flushed but not closed, further
+        records are written synchronously. Nothing is done once the
+        stream is removed from the logger.
+        """
+        if self._detached:
+            return
+
+        self._flush_filters()
+
+        if self._writer is not None:
+            self._writer.close(timeout)
+
+        self._flush_buffer()
+        flush_sink(self.stream)
+
+
+def _close_buffered_streams():
+    """Write the buffers of all the streams before the interpreter
+    exits."""
+    for stream in list(_buffered_streams):
+        stream.close()
+
+
+atexit.register(_close_buffered_streams)
@@ -0,0 +1,97 @@
+"""Structured output streams for the logger.
+
+These streams write every record as one JSON object per line
+(NDJSON) instead of formatting it with a format string, so that
+log pipelines can ingest them without parsing.
+"""
+
+from json import dumps
+
+from simber.formatter import Formatter
+from simber.stream import OutputStream
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_encoder(record) -> str:
+    """Encode the record with the json module of the standard
+    library."""
+    return dumps(record, default=str, ensure_ascii=False,
+                 separators=(",", ":"))
+
+
+def _orjson_encoder(record) -> str:
+    """Encode the record with orjson."""
+    return orjson.dumps(record, default=str).decode("utf-8")
+
+
+default_encoder = _orjson_encoder if orjson is not None else _json_encoder
+
+
+class JSONOutputStream(OutputStream):
+    """Write records to the stream as JSON objects, one per line.
+
+    Every object contains the following fields
+
+    time:           Time of the record. ISO 8601 by default or as
+                    per `time_format` if it is passed.
+    levelname:      Name of the level of the record.
+    levelno:        Number of the level of the record.
+    logger:         Name of the logger.
+    filename:       Name of the file the record is logged from.
+    funcname:       Name of the function the record is logged from.
+    lineno:         Line number the record is logged from.
+    message:        The message.
+
+    Keyword arguments passed to the log methods and the fields bound
+    to the logger or to the context are added as extra fields. They
+    can not override the above fields.
+
+    encoder:        Function that takes the dict of the record and
+                    returns the encoded string. By default orjson is
+                    used if it is installed, else the json module.
+
+    The `format` of the stream is not used and no colors are added.
+    """
+
+    def __init__(self, stream, level: str = None, encoder=None, **kwargs):
+        super().__init__(stream, level, **kwargs)
+
+        self._encoder = default_encoder if encoder is None else encoder
+        self._formatter = Formatter()
+
+    @property
+    def encoder(self):
+        return self._encoder
+
+    @property
+    def uses_caller(self) -> bool:
+        return True
+
+    def _get_time(self, created) -> str:
+        """Get the time of the record as a string."""
+        return self._formatter._get_time(
+            self._time_format if self._time_format is not None
+            else "%Y-%m-%dT%H:%M:%S.%f", created)
+
+    def _make_format(self, record):
+        """Build the dict of the record and encode it."""
+        data = {
+            "time": self._get_time(record.created),
+            "levelname": record.levelname,
+            "levelno": record.levelno,
+            "logger": record.name,
+            "filename": record.filename,
+            "funcname": record.funcname,
+            "lineno": record.lineno,
+            "message": record.message
+        }
+
+        if record.extra:
+            for key, value in record.extra.items():
+                data.setdefault(key, value)
+
+        return self._encoder(data) + "\n"
@@ -0,0 +1,208 @@
+"""Write the output of streams from a background thread.
+
+The `AsyncWriter` keeps a bounded queue of formatted records
+and a dedicated thread drains the queue in batches. This way
+the thread that is logging never has to wait for the actual
+I/O to finish.
+"""
+
+import atexit
+import os
+from collections import deque
+from threading import Condition, Lock, Thread
+from weakref import WeakSet
+
+from simber.exceptions import InvalidOverflowPolicy
+
+
+BLOCK = "block"
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+
+OVERFLOW_POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST)
+
+# All the writers that are alive, used to drain them on exit
+_writers = WeakSet()
+
+
+class AsyncWriter(object):
+    """Write the passed strings to the output on a background
+    thread.
+
+    emit:           Function that does the actual write. It will be
+                    called with the joined string of a batch.
+    queue_size:     Maximum number of records that can wait in the
+                    queue.
+    overflow:       What to do when the queue is full. `block` waits
+                    for space, `drop_newest` drops the record being
+                    added and `drop_oldest` drops the oldest record
+                    in the queue. Dropped records are counted in
+                    `dropped`.
+    flush:          Function to call after a batch is written if any
+                    of the records in it asked for a flush.
+    """
+
+    def __init__(self, emit, queue_size: int = 10000,
+                 overflow: str = BLOCK, flush=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise InvalidOverflowPolicy(overflow)
+
+        self._emit = emit
+        self._flush = flush
+        self._queue_size = max(1, queue_size)
+        self._overflow = overflow
+        self._dropped = 0
+        self._errors = 0
+        self._closed = False
+
+        self._init_state()
+        _writers.add(self)
+
+    def _init_state(self):
+        """Create the queue and the locks. The writer thread is only
+        started once the first record is added, so writers that are
+        never used, like the streams a logger drops as duplicates,
+        do not leave a thread behind.
+
+        This is also called in the child after a fork since the
+        thread of the parent does not exist there.
+        """
+        self._queue = deque()
+        self._busy = False
+        self._flush_requested = False
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+        self._idle = Condition(self._lock)
+        self._thread = None
+
+    def _start_thread(self):
+        """Start the writer thread, the lock should be held."""
+        self._thread = Thread(target=self._run,
+                              name="simber-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    @property
+    def errors(self) -> int:
+        return self._errors
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(self, text: str, flush: bool = False) -> bool:
+        """Add the passed string to the queue.
+
+        If flush is True, the flush function is called once the
+        batch containing this string is written.
+
+        Returns False if the string had to be dropped because
+        of the overflow policy.
+        """
+        with self._lock:
+            if not self._closed:
+                if len(self._queue) >= self._queue_size:
+                    if self._overflow == DROP_NEWEST:
+                        self._dropped += 1
+                        return False
+
+                    if self._overflow == DROP_OLDEST:
+                        self._queue.popleft()
+                        self._dropped += 1
+                    else:
+                        while len(self._queue) >= self._queue_size and \
+                                not self._closed:
+                            self._not_full.wait()
+
+                if not self._closed:
+                    if self._thread is None:
+                        self._start_thread()
+
+                    self._queue.append(text)
+                    self._flush_requested |= flush
+                    self._not_empty.notify()
+                    return True
+
+        # The writer is closed, write it directly
+        self._emit(text)
+        if flush and self._flush is not None:
+            self._flush()
+
+        return True
+
+    def _run(self):
+        """Drain the queue till the writer is closed."""
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+
+                if not self._queue:
+                    return
+
+                batch = self._queue
+                self._queue = deque()
+                flush = self._flush_requested and self._flush is not None
+                self._flush_requested = False
+                self._busy = True
+                self._not_full.notify_all()
+
+            try:
+                self._emit("".join(batch))
+
+                if flush:
+                    self._flush()
+            except Exception:
+                self._errors += 1
+            finally:
+                with self._lock:
+                    self._busy = False
+                    self._idle.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait till all the records in the queue are written.
+
+        Returns False if the timeout expired before that.
+        """
+        with self._lock:
+            return self._idle.wait_for(
+                lambda: not self._queue and not self._busy, timeout)
+
+    def close(self, timeout: float = None):
+        """Write all the pending records and stop the thread.
+
+        Any record that is added after closing is written
+        directly by the calling thread.
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+            thread = self._thread
+
+        if thread is not None:
+            thread.join(timeout)
+
+
+def _reinit_after_fork():
+    """Restart the threads of all the writers in the child
+    process since threads are not copied on fork."""
+    for writer in list(_writers):
+        if not writer.closed:
+            writer._init_state()
+
+
+def _close_all():
+    """Drain all the writers before the interpreter exits."""
+    for writer in list(_writers):
+        writer.close()
+
+
+atexit.register(_close_all)
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reinit_after_fork)
@@ -0,0 +1,108 @@
+"""Test the fields bound to the context"""
+
+import asyncio
+from os import devnull
+from threading import Thread
+
+from pytest import mark
+
+from simber.context import (
+    ContextVar, _ThreadContextVar, bind_context, bound_context,
+    clear_context, get_context, reset_context, unbind_context
+)
+from simber.logger import Logger
+from simber.ringbuffer import RingBufferStream
+from simber.stream import OutputStream
+
+
+def test_bind_context():
+    """Test binding and unbinding the fields"""
+    token = bind_context(request_id=1, tenant="acme")
+    assert get_context() == {"request_id": 1, "tenant": "acme"}, \
+        "Should bind the fields"
+
+    unbind_context("tenant", "missing")
+    assert get_context() == {"request_id": 1}, "Should unbind the field"
+
+    with bound_context(request_id=2):
+        assert get_context() == {"request_id": 2}, "Should replace it"
+
+    assert get_context() == {"request_id": 1}, "Should restore the fields"
+
+    clear_context()
+    assert get_context() == {}, "Should clear the fields"
+
+    reset_context(token)
+    assert get_context() == {}, "Should go back to before the bind"
+
+
+def test_thread_context_var():
+    """Test the fallback used when contextvars is not present"""
+    variable = _ThreadContextVar("test", default={})
+    token = variable.set({"request_id": 1})
+    seen = []
+
+    thread = Thread(target=lambda: seen.append(variable.get()))
+    thread.start()
+    thread.join()
+
+    assert seen == [{}], "Other threads should not see the value"
+    assert variable.get() == {"request_id": 1}, "Should keep the value"
+
+    variable.reset(token)
+    assert variable.get() == {}, "Should go back to the old value"
+
+
+def _make_logger(name):
+    """Build a logger that keeps its records in a ring buffer."""
+    logger = Logger(name, propagate=False)
+    buffer = RingBufferStream(OutputStream(open(devnull, "w")),
+                              dump_level=None)
+    logger.add_stream(buffer, shared=False)
+
+    return logger, buffer
+
+
+@mark.skipif(ContextVar is None, reason="Needs contextvars")
+def test_context_tasks():
+    """Test that every asyncio task has its own fields"""
+    logger, buffer = _make_logger("test_context_tasks")
+    bound = logger.bind(tenant="acme")
+
+    async def handle(request_id):
+        bind_context(request_id=request_id)
+        await asyncio.sleep(0)
+        bound.info("handled")
+
+    async def main():
+        await asyncio.gather(*(handle(index) for index in range(3)))
+
+    asyncio.run(main())
+
+    assert [record.extra for record in buffer.records()] == [
+        {"request_id": index, "tenant": "acme"} for index in range(3)
+    ], "Every task should have its own fields"
+    assert get_context() == {}, "Should not change the current context"
+
+    logger.remove_stream(buffer)
+
+
+def test_context_records():
+    """Test the fields added to the records"""
+    logger, buffer = _make_logger("test_context")
+
+    with bound_context(request_id=5):
+        logger.info("first")
+        logger.info("second")
+        logger.info("passed", request_id=6)
+
+    logger.info("outside")
+
+    records = buffer.records()
+    assert records[0].extra is records[1].extra, \
+        "Should not copy the fields if they did not change"
+    assert records[2].extra == {"request_id": 6}, \
+        "Passed fields should take precedence"
+    assert not records[3].extra, "Should not have the fields anymore"
+
+    logger.remove_stream(buffer)
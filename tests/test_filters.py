@@ -0,0 +1,123 @@
+"""Test the filters"""
+
+from simber.filters import DuplicateFilter, RateLimitFilter, SamplingFilter
+from simber.logger import Logger
+from simber.message import Message
+from simber.record import LogRecord
+from simber.stream import OutputStream
+
+
+def _record(message, lineno=1, level=1, extra=None):
+    return LogRecord(level, "INFO", "test", 0.0, Message(message), extra,
+                     filename="test.py", funcname="test", lineno=lineno)
+
+
+def test_rate_limit():
+    """Test the rate limit filter"""
+    rate_filter = RateLimitFilter(rate=0.001, burst=3)
+
+    passed = [rate_filter(_record("hello")) for _ in range(10)]
+    assert sum(record is not None for record in passed) == 3, \
+        "Should only let the burst through"
+    assert rate_filter.suppressed == 7, "Should count the dropped records"
+
+    assert rate_filter(_record("hello", lineno=2)) is not None, \
+        "Other call sites should have their own bucket"
+
+
+def test_duplicate():
+    """Test the duplicate filter"""
+    duplicate_filter = DuplicateFilter(interval=60)
+
+    assert duplicate_filter(_record("down")) is not None, \
+        "Should let the first record through"
+    assert duplicate_filter(_record("down")) is None, \
+        "Should drop the repeat"
+    assert duplicate_filter(_record("up")) is not None, \
+        "Should let a new message through"
+    assert duplicate_filter.suppressed == 1, "Should count the repeats"
+
+    duplicate_filter = DuplicateFilter(interval=0)
+    duplicate_filter(_record("down"))
+    record = duplicate_filter(_record("down"))
+    assert record.message == "down (repeated 1 time)", \
+        "Should write the repeat count after the interval"
+
+    duplicate_filter = DuplicateFilter(interval=60)
+    for _ in range(101):
+        duplicate_filter(_record("down"))
+    records = duplicate_filter(_record("up"))
+    assert [record.message for record in records] == \
+        ["down (repeated 100 times)", "up"], \
+        "Should write the pending count before the new message"
+
+    duplicate_filter(_record("up"))
+    assert [record.message for record in duplicate_filter.flush()] == \
+        ["up (repeated 1 time)"], "Should write the pending count on flush"
+    assert duplicate_filter.flush() == (), "Should forget the flushed counts"
+
+
+def test_sampling():
+    """Test the sampling filter"""
+    sampling_filter = SamplingFilter(every=4)
+
+    passed = [sampling_filter(_record("hello")) for _ in range(8)]
+    assert sum(record is not None for record in passed) == 2, \
+        "Should keep one in every 4 records"
+    assert sampling_filter.suppressed == 6, "Should count the dropped records"
+
+    assert all(sampling_filter(_record("oops", level=3)) is not None
+               for _ in range(4)), "Should always keep errors"
+
+    sampling_filter = SamplingFilter(every={"DEBUG": 2})
+    assert all(sampling_filter(_record("hello")) is not None
+               for _ in range(4)), "Should not sample other levels"
+
+    sampling_filter = SamplingFilter(every=3, key="request_id")
+    for request_id in range(10):
+        kept = [sampling_filter(_record("hello", extra={
+            "request_id": request_id})) is not None for _ in range(3)]
+        assert len(set(kept)) == 1, "Should keep or drop the whole request"
+
+
+def test_logger_filters(tmp_path):
+    """Test the filters on the logger and the streams"""
+    logger = Logger("test_filters", filters=[RateLimitFilter(0.001, 2)])
+
+    log_path = str(tmp_path / "filters.log")
+    stream = OutputStream(open(log_path, "w"), level="DEBUG",
+                          format="{message}", filters=[DuplicateFilter()])
+    logger.add_stream(stream, shared=False)
+
+    for i in range(5):
+        logger.info("limited %d", i)
+
+    for i in range(2):
+        logger.info("repeated")
+
+    logger.remove_stream(stream)
+
+    with open(log_path) as f:
+        lines = f.read().splitlines()
+
+    assert lines == ["limited 0", "limited 1", "repeated",
+                     "repeated (repeated 1 time)"], \
+        "Should limit and collapse the records"
+
+    logger = Logger("test_filters_logger", filters=[DuplicateFilter()])
+    stream = OutputStream(open(log_path, "w"), level="DEBUG",
+                          format="{message}")
+    logger.add_stream(stream, shared=False)
+
+    for message in ["down"] * 3 + ["up"] * 2:
+        logger.info(message)
+    logger.flush()
+
+    logger.remove_stream(stream)
+
+    with open(log_path) as f:
+        lines = f.read().splitlines()
+
+    assert lines == ["down", "down (repeated 2 times)", "up",
+                     "up (repeated 1 time)"], \
+        "Should write the pending counts of the logger filters"
@@ -1,9 +1,13 @@
 """Test if the formatter is working all right."""
 
-from simber.formatter import Formatter
+from simber.formatter import Formatter, TimeCache
+from simber.levels import register_level
+from simber.message import Message
+from simber.record import LogRecord
 from typing import Dict
 from datetime import datetime
 from pytest import raises
+from colorama import Fore
 
 
 def test__get_level():
@@ -27,3 +31,63 @@ def test__get_time():
     assert formatter._get_time(
         time_format) == datetime.now().strftime(time_format),\
         "Should return the time in same format"
+
+
+def test_compile():
+    """Test that the compiled template only uses the fields present"""
+    template = Formatter().compile("[{levelname}] [{lineno:>4}]")
+
+    assert template.fields == frozenset(
+        ("levelname", "lineno", "message")), "Fields not extracted properly"
+    assert template.uses_caller, "Should need the caller details"
+
+    template = Formatter().compile("[{logger}]")
+    assert not template.uses_caller, "Should not need the caller details"
+    record = LogRecord(1, "INFO", "test", None, Message("nana"))
+    assert template.render(record) == "[test] nana",\
+        "Should not touch the caller details or the time"
+
+    template = Formatter().compile("[{request_id}] [{tenant:>5}]")
+    record = LogRecord(1, "INFO", "test", None, Message("nana"),
+                       {"request_id": 7})
+    assert template.render(record) == "[7] [     ] nana",\
+        "Should take the other fields from the extra fields"
+
+
+def test_time_cache():
+    """Test that the cached time matches strftime"""
+    cache = TimeCache()
+    timestamp = 1600000000.25
+
+    for time_format in ("%d/%m/%Y %H:%M:%S", "%H:%M:%S.%f", "%%f %f"):
+        expected = datetime.fromtimestamp(timestamp).strftime(time_format)
+        assert cache.get(time_format, timestamp) == expected,\
+            "Should match strftime for {}".format(time_format)
+
+    # Same second should reuse the rendered parts
+    assert cache.get("%S.%f", timestamp + 0.5).endswith(".750000"),\
+        "Should only update the microseconds"
+
+
+def test_compile_colors():
+    """Test that the colors are resolved in the format only"""
+    template = Formatter().compile("%a[{levelname}]%")
+    record = LogRecord(1, "INFO", "test", None, Message("100%r done%"))
+
+    assert template.render(record) == \
+        Fore.GREEN + "[INFO]" + Fore.RESET + " 100%r done%",\
+        "Should not color the message"
+
+    record = LogRecord(3, "ERROR", "test", None, Message("nana"))
+    assert template.render(record).startswith(Fore.RED),\
+        "Should use the color of the level"
+
+    info = LogRecord(1, "INFO", "test", None, Message("nana"))
+    register_level("INFO", 1, "m")
+    assert template.render(info).startswith(Fore.MAGENTA),\
+        "Should use the new color of the level"
+    register_level("INFO", 1, "g")
+
+    template = Formatter().compile("%a[{levelname}]%", colors=False)
+    assert template.render(record) == "[ERROR] nana",\
+        "Should remove the colors"
@@ -0,0 +1,21 @@
+"""Test that importing simber stays light"""
+
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+
+def test_lazy_imports():
+    """Test that the slow modules are only imported when used"""
+    code = "import sys, simber; " \
+        "print(sys.stdout is sys.__stdout__, *sys.modules)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=dirname(dirname(abspath(__file__))),
+        stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout
+    unwrapped, *modules = output.split()
+
+    assert unwrapped == "True", "Should not wrap stdout"
+
+    for module in ("colorama", "multiprocessing", "pathlib", "datetime",
+                   "socket", "gzip", "typing"):
+        assert module not in modules, "Should not import {}".format(module)
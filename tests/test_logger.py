@@ -1,10 +1,15 @@
 """Test the Logger module"""
 
+import gc
 from os import remove
 from sys import stderr
+from threading import Event, Thread, active_count
 
-from simber.logger import Logger
+from pytest import raises
+
+from simber.logger import Logger, get_logger
 from simber.configurations import Default
+from simber.exceptions import DuplicateLevel
 from simber.stream import OutputStream
 
 
@@ -92,3 +97,332 @@ def test_add_stream():
     logger1.add_stream(new_stream)
 
     assert new_stream in logger1.streams, "Adding stream failed"
+
+
+def test_is_enabled_for():
+    """
+    Test that the cached minimum level follows the streams.
+    """
+    logger = Logger("test_enabled")
+
+    for stream in logger.streams:
+        stream.level = 2
+
+    assert not logger.is_enabled_for("INFO"), "INFO should be filtered"
+    assert logger.is_enabled_for(3), "ERROR should be enabled"
+
+    logger.update_level("DEBUG")
+    logger.update_file_level("DEBUG")
+    assert logger.is_enabled_for("DEBUG"), "DEBUG should be enabled"
+
+    disabled_states = [(stream, stream.disabled) for stream in logger.streams]
+    for stream in logger.streams:
+        stream.disabled = True
+
+    assert not logger.is_enabled_for("CRITICAL"), "Nothing should be enabled"
+
+    for stream, disabled in disabled_states:
+        stream.disabled = disabled
+
+
+def test_register_level(tmp_path):
+    """
+    Test registering a custom level and logging through it.
+    """
+    Logger.register_level("TRACE", -1, "c")
+    Logger.register_level("NOTICE", 1.5)
+
+    with raises(DuplicateLevel):
+        Logger.register_level("NOTICE", 2)
+
+    with raises(DuplicateLevel):
+        Logger.register_level("STREAMS", 10)
+
+    with raises(DuplicateLevel):
+        Logger.register_level("FIELDS", 10)
+
+    file_path = str(tmp_path / "levels.txt")
+    stream = OutputStream(open(file_path, "w"), level="TRACE",
+                          format="{levelname}")
+
+    logger = Logger("test_levels")
+    logger.add_stream(stream)
+    assert logger.is_enabled_for("TRACE"), "TRACE should be enabled"
+
+    logger.trace("tracing")
+    logger.notice("noticing")
+    logger.bind(tag=1).trace("bound")
+    logger.remove_stream(stream)
+
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+
+    assert lines == ["TRACE tracing", "NOTICE noticing", "TRACE bound"], \
+        "Levels not used"
+    assert Default().color_level_map["TRACE"] == "c", "Color not registered"
+
+    Logger.register_level("INFO", 1, "m")
+    assert Default().color_level_map["INFO"] == "m", "Should update the color"
+    assert not hasattr(Logger.info, "_simber_level"), \
+        "Should keep the built in method"
+    Logger.register_level("INFO", 1, "g")
+
+
+def test_threaded_streams(tmp_path):
+    """
+    Test logging from many threads while streams are added and
+    removed.
+    """
+    logger = Logger("test_threads")
+    previous = [(stream, stream.disabled) for stream in logger.streams]
+    for stream in logger.streams:
+        stream.disabled = True
+
+    keep_path = str(tmp_path / "keep.log")
+    keep = OutputStream(open(keep_path, "w"), level="DEBUG",
+                        format="{message}")
+    logger.add_stream(keep)
+
+    errors = []
+    stop = Event()
+
+    def log(worker):
+        try:
+            for i in range(500):
+                logger.info("{}-{}".format(worker, i))
+        except Exception as e:
+            errors.append(e)
+
+    def churn():
+        count = 0
+        try:
+            while not stop.is_set():
+                stream = OutputStream(
+                    open(str(tmp_path / "churn{}.log".format(count)), "w"),
+                    level="DEBUG")
+                logger.add_stream(stream)
+                logger.remove_stream(stream)
+                count += 1
+        except Exception as e:
+            errors.append(e)
+
+    churner = Thread(target=churn)
+    churner.start()
+    workers = [Thread(target=log, args=(i,)) for i in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop.set()
+    churner.join()
+
+    logger.remove_stream(keep)
+    for stream, disabled in previous:
+        stream.disabled = disabled
+
+    assert not errors, "No thread should fail"
+
+    with open(keep_path) as f:
+        lines = f.read().splitlines()
+
+    assert len(lines) == 4000, "Every record should be written"
+    assert all(line.count("-") == 1 for line in lines),\
+        "Lines should not be mixed"
+
+
+def test_logger_hierarchy(tmp_path):
+    """Test the registry and the streams of the loggers"""
+    app = get_logger("hierarchy")
+    assert get_logger("hierarchy") is app, "Should return the same logger"
+
+    db = get_logger("hierarchy.db")
+    other = get_logger("hierarchy_other")
+
+    app_path = str(tmp_path / "app.log")
+    app_stream = OutputStream(open(app_path, "w"), level="DEBUG")
+    app.add_stream(app_stream, shared=False)
+
+    assert app_stream in app.streams, "Should be in the logger streams"
+    assert app_stream in db.streams, "Should be inherited by the child"
+    assert app_stream not in other.streams, "Should not be shared"
+
+    db.info("from child")
+    other.info("from other")
+
+    db.propagate = False
+    db.info("not propagated")
+    assert app_stream not in db.streams, "Should not propagate"
+
+    app.remove_stream(app_stream)
+    assert all(stream is not app_stream for stream in app.streams), \
+        "Should be removed"
+
+    with open(app_path) as f:
+        content = f.read()
+
+    assert "from child" in content, "Child should write to the parent"
+    assert "from other" not in content, "Other logger should not write"
+    assert "not propagated" not in content, "Should not propagate"
+
+    # Loggers from get_logger should be kept to be found again
+    del app, db, other
+    gc.collect()
+    assert not get_logger("hierarchy.db").propagate, \
+        "Should return the configured logger"
+
+    # Loggers created directly should be removed from the registry
+    Logger("hierarchy_direct", propagate=False)
+    gc.collect()
+    assert get_logger("hierarchy_direct").propagate, \
+        "Should create a new logger"
+
+
+def test_configured_parent(tmp_path):
+    """Test configuring a parent by name and logging from a child"""
+    stream = OutputStream(open(str(tmp_path / "app.log"), "w"))
+    get_logger("configured").add_stream(stream, shared=False)
+
+    gc.collect()
+    assert stream in get_logger("configured.db").streams, \
+        "Should keep the configured parent"
+
+
+def test_logger_own_streams(tmp_path):
+    """Test that the default streams of get_logger are not shared"""
+    a_path = str(tmp_path / "a.log")
+    b_path = str(tmp_path / "b.log")
+    a = get_logger("own_streams_a", log_path=a_path, level="WARNING")
+    b = get_logger("own_streams_b", log_path=b_path, level="DEBUG")
+
+    assert not any(own is shared for own in a._own_streams
+                   for shared in Logger._streams), \
+        "Should not add the default streams to the shared streams"
+    assert a.streams[0].level == 2 and b.streams[0].level == 0, \
+        "Every logger should have its own console level"
+
+    a.warning("from a")
+    b.warning("from b")
+
+    with open(a_path) as f:
+        assert "from b" not in f.read(), "Should not write the other logger"
+    with open(b_path) as f:
+        assert "from a" not in f.read(), "Should not write the other logger"
+
+
+def test_collected_parent(tmp_path):
+    """Test that a child stops using the streams of a collected parent"""
+    parent = Logger("collected")
+    child = get_logger("collected.child")
+
+    stream = OutputStream(open(str(tmp_path / "parent.log"), "w"))
+    parent.add_stream(stream, shared=False)
+    assert stream in child.streams, "Should inherit the parent streams"
+
+    del parent
+    gc.collect()
+    assert stream not in child.streams, "Should forget the parent streams"
+
+
+def test_stacklevel(tmp_path):
+    """Test the caller details and the stacklevel param"""
+    logger = Logger("test_stacklevel")
+
+    log_path = str(tmp_path / "caller.log")
+    stream = OutputStream(open(log_path, "w"), level="DEBUG",
+                          format="{funcname}:{lineno} {message}")
+    logger.add_stream(stream, shared=False)
+
+    def wrapper(message):
+        logger.info(message, stacklevel=2)
+
+    def caller():
+        logger.info("direct")
+        wrapper("wrapped")
+
+    caller()
+    logger.remove_stream(stream)
+
+    with open(log_path) as f:
+        direct, wrapped = f.read().splitlines()
+
+    line = caller.__code__.co_firstlineno
+    assert direct == "caller:{} direct".format(line + 1), \
+        "Should show the caller of the log method"
+    assert wrapped == "caller:{} wrapped".format(line + 2), \
+        "Should show the caller of the wrapper"
+
+    logger._update_min_level()
+    assert logger._needs_caller == any(
+        stream.uses_caller for stream in logger.streams
+        if not stream.disabled), "Should only find the caller if needed"
+
+
+def test_stats(tmp_path):
+    """Test the counters of the logger"""
+    logger = Logger("test_stats", propagate=False,
+                    filters=[lambda record: None
+                             if record.levelno == 2 else record])
+    stream = OutputStream(open(str(tmp_path / "stats.log"), "w"),
+                          level="INFO")
+    logger.add_stream(stream, shared=False)
+
+    logger.debug("filtered")
+    logger.info("accepted")
+    logger.warning("suppressed")
+
+    stats = logger.stats()
+    assert (stats["accepted"], stats["filtered"], stats["suppressed"]) == \
+        (1, 1, 1), "Should count the records of the logger"
+    assert stats["streams"][stream.stream_name]["accepted"] == 1, \
+        "Should have the counters of the streams"
+
+    logger.reset_stats()
+    assert logger.stats()["accepted"] == 0, "Should reset the counters"
+    assert stream.stats()["accepted"] == 0, "Should reset the streams"
+
+    logger.remove_stream(stream)
+
+
+def test_bind(tmp_path):
+    """Test the fields bound to the logger"""
+    logger = Logger("test_bind", propagate=False)
+
+    log_path = str(tmp_path / "bind.log")
+    stream = OutputStream(open(log_path, "w"), level="DEBUG",
+                          format="{tenant}|{request_id}|{funcname}")
+    logger.add_stream(stream, shared=False)
+
+    bound = logger.bind(tenant="acme")
+    assert bound not in Logger._instances, "Should not be kept"
+    assert bound.name == logger.name, "Should take the logger attributes"
+
+    def caller():
+        bound.info("bound")
+        bound.bind(request_id=1).info("chained")
+        bound.info("passed", tenant="other")
+        logger.info("plain")
+
+    caller()
+    logger.remove_stream(stream)
+
+    with open(log_path) as f:
+        assert f.read().splitlines() == [
+            "acme||caller bound",
+            "acme|1|caller chained",
+            "other||caller passed",
+            "||caller plain",
+        ], "Should add the bound fields to the records"
+
+    assert bound.fields == {"tenant": "acme"}, "Should not be changed"
+    assert bound.bind(request_id=1).unbind("tenant").fields == \
+        {"request_id": 1}, "Should remove the fields"
+
+
+def test_async_duplicate_streams():
+    """Test that the streams dropped as duplicates leave no thread"""
+    before = active_count()
+
+    for _ in range(20):
+        Logger("test_async_streams", asynchronous=True)
+
+    assert active_count() <= before, "Should not start the writer threads"
@@ -0,0 +1,59 @@
+"""Test the lazy message building."""
+
+from simber.message import Message, lazy
+
+
+def test_render():
+    """Test the different ways the message is built"""
+    assert Message("x=%s y=%d", ("a", 2)).render() == "x=a y=2",\
+        "Should use printf style formatting"
+    assert Message("nana", (1, None)).render() == "nana 1 None",\
+        "Should append non string args"
+    assert Message("100% done", ("nana",)).render() == "100% done nana",\
+        "Should fall back to appending"
+    assert Message("%(x)s", ({"x": 1},)).render() == "1",\
+        "Should support a mapping"
+    assert Message("nana").render() == "nana", "Should not add a space"
+
+
+def test_render_once():
+    """Test that callables are called lazily and only once"""
+    calls = []
+
+    def expensive():
+        calls.append(1)
+        return "value"
+
+    message = Message("x=%s", (expensive,))
+    assert not calls, "Should not be called before rendering"
+
+    assert "{}".format(message) == "x=value", "Callable should be resolved"
+    assert str(message) == "x=value", "Should render the same message"
+    assert len(calls) == 1, "Should only be rendered once"
+
+
+def test_render_callables():
+    """Test that only the lazy callables are called"""
+    class Handler(object):
+        def __call__(self, request):
+            return request
+
+        def __str__(self):
+            return "handler"
+
+    def handle(request):
+        return request
+
+    def fail():
+        raise ValueError("nana")
+
+    assert Message("got", (Handler(),)).render() == "got handler",\
+        "Should not call callable objects"
+    assert Message("got %s", (handle,)).render() == \
+        "got {}".format(handle), "Should not call functions with args"
+    assert Message("got %s", (lazy(handle, 1),)).render() == "got 1",\
+        "Should call lazy with the args"
+    assert Message("got %s", (lambda x=2: x,)).render() == "got 2",\
+        "Should call functions with defaults"
+    assert Message("got %s", (fail,)).render() == "got {}".format(fail),\
+        "Should use the function if the call fails"
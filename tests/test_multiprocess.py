@@ -0,0 +1,112 @@
+"""Test writing through the collector process."""
+
+from multiprocessing import Process, get_start_method
+from multiprocessing.connection import SocketListener
+from time import sleep
+
+from pytest import mark, raises
+
+from simber.exceptions import InvalidCollectorOptions
+from simber.multiprocess import CollectorClient, LogCollector
+from simber.stream import OutputStream
+from simber.message import Message
+from simber.record import LogRecord
+
+
+def _work(file_path, address, worker):
+    """Write a few records from a worker process"""
+    stream = OutputStream(open(file_path, "a"), format="{message}",
+                          collector=address)
+
+    for i in range(50):
+        stream.write(LogRecord(1, "INFO", "test", 0,
+                               Message("{}-{}".format(worker, i))))
+
+
+def test_collector(tmp_path):
+    """Test that the collector writes the records of all the workers
+    and that the stream falls back to direct writes"""
+    file_path = str(tmp_path / "collected.log")
+    collector = LogCollector().start()
+
+    workers = [Process(target=_work, args=(file_path, collector.address, i))
+               for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    address = collector.address
+    collector.stop()
+
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+
+    assert len(lines) == 200, "All the records should be written"
+    for worker in range(4):
+        assert [line for line in lines if line.startswith(
+            "{}-".format(worker))] == [
+                "{}-{}".format(worker, i) for i in range(50)],\
+            "Records of a worker should be in order"
+
+    # Collector is gone, it should write directly
+    _work(file_path, address, "direct")
+
+    with open(file_path) as f:
+        assert len(f.read().splitlines()) == 250, "Should fall back"
+
+
+def test_collector_authkey(tmp_path):
+    """Test that the collector only writes for workers with its key"""
+    file_path = str(tmp_path / "collected.log")
+    collector = LogCollector(authkey=b"collector key").start()
+
+    intruder = CollectorClient(collector.address, authkey=b"other key",
+                               retry_interval=0)
+    assert not intruder.send(file_path, "intruder\n"), \
+        "Should not accept the wrong key"
+
+    client = CollectorClient(collector.address, authkey=b"collector key")
+    assert client.send(file_path, "worker\n"), "Should accept the key"
+
+    client.close()
+    collector.stop()
+
+    with open(file_path) as f:
+        assert f.read() == "worker\n", "Should only write for the key"
+
+
+@mark.skipif(get_start_method() != "fork",
+             reason="The collector needs to inherit the slow accept")
+def test_collector_stop(tmp_path, monkeypatch):
+    """Test that records sent right before stopping are written even
+    if the collector is slow to accept the worker"""
+    accept = SocketListener.accept
+
+    def slow_accept(self):
+        connection = accept(self)
+        sleep(0.2)
+        return connection
+
+    monkeypatch.setattr(SocketListener, "accept", slow_accept)
+
+    file_path = str(tmp_path / "collected.log")
+    collector = LogCollector().start()
+
+    client = CollectorClient(collector.address)
+    assert client.send(file_path, "last\n"), "Should send the record"
+    collector.stop()
+    client.close()
+
+    with open(file_path) as f:
+        assert f.read() == "last\n", "Should write the record on stop"
+
+
+def test_collector_options(tmp_path):
+    """Test that a collector can not be used with rotation or a buffer"""
+    log_path = str(tmp_path / "options.log")
+
+    for options in ({"max_bytes": 100}, {"rotate_interval": 60},
+                    {"buffer_size": 100}):
+        with open(log_path, "a") as f, raises(InvalidCollectorOptions):
+            OutputStream(f, collector="unused.sock", **options)
@@ -0,0 +1,63 @@
+"""Test the ring buffer stream"""
+
+from io import StringIO
+
+from simber.logger import Logger
+from simber.ringbuffer import RingBufferStream
+from simber.stream import OutputStream
+
+
+def test_ring_buffer(tmp_path):
+    """Test keeping the records and dumping them"""
+    log_path = str(tmp_path / "ring.log")
+    target = OutputStream(open(log_path, "w"), level="DEBUG",
+                          format="{levelname} {message}")
+    ring = RingBufferStream(target, capacity=3)
+
+    logger = Logger("test_ring_buffer")
+    logger.add_stream(ring, shared=False)
+
+    for i in range(5):
+        logger.debug("step %d", i)
+
+    assert len(ring) == 3, "Should only keep the capacity"
+    assert [record.message for record in ring.records()] == \
+        ["step 2", "step 3", "step 4"], "Should keep the last records"
+
+    logger.error("failed")
+    assert len(ring) == 0, "Should be emptied on dump"
+
+    logger.info("after")
+    ring.disabled = True
+    logger.info("disabled")
+    ring.disabled = False
+    assert ring.dump() == 1, "Should not keep records when disabled"
+
+    target.level = 1
+    logger.debug("below")
+    logger.info("above")
+    assert ring.dump() == 1, "Should apply the level of the target"
+
+    logger.remove_stream(ring)
+    target.flush()
+
+    with open(log_path) as f:
+        lines = f.read().splitlines()
+
+    assert lines == ["DEBUG step 3", "DEBUG step 4", "ERROR failed",
+                     "INFO after", "INFO above"], "Should dump the records to the target"
+
+
+def test_ring_buffer_stream():
+    """Test that the ring buffer is a complete stream"""
+    target = OutputStream(StringIO(), format="%a{levelname}%")
+    ring = RingBufferStream(target)
+
+    assert not ring.colors, "Should take the colors of the target"
+    ring.colors = True
+    assert ring.colors, "Should set the colors"
+
+    assert ring != RingBufferStream(target), \
+        "Should not be equal to another buffer"
+    assert ring.stats()["accepted"] == 0, "Should have the counters"
+    ring.flush()
@@ -0,0 +1,23 @@
+"""Test the histograms"""
+
+from simber.stats import Histogram
+
+
+def test_histogram():
+    """Test the percentiles of the histogram"""
+    histogram = Histogram()
+    assert histogram.percentile(50) == 0, "Should be 0 when empty"
+
+    for value in range(1, 1001):
+        histogram.record(value)
+
+    summary = histogram.to_dict()
+    assert summary["count"] == 1000, "Should count the values"
+    assert summary["min"] == 1 and summary["max"] == 1000, \
+        "Should keep the min and the max"
+    assert 500 <= summary["p50"] <= 500 * 1.125, \
+        "Should be within the precision of the buckets"
+    assert summary["p999"] == 1000, "Should not go above the max"
+
+    histogram.reset()
+    assert histogram.count == 0, "Should forget the values"
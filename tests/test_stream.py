@@ -0,0 +1,307 @@
+"""Test the stream module of the logger."""
+
+import os
+import socket
+from io import BytesIO, StringIO
+from multiprocessing import Process
+from os import remove
+from threading import Event
+
+from pytest import raises
+
+from simber.exceptions import InvalidOverflowPolicy, InvalidStream
+from simber.message import Message
+from simber.record import LogRecord
+from simber.logger import Logger
+from simber.stream import (
+    OutputStream, _buffered_streams, _close_buffered_streams
+)
+from simber.writer import AsyncWriter
+
+
+def _record(message, level=1):
+    """Build a record to write to the streams"""
+    return LogRecord(level, "INFO", "test", 0, Message(message))
+
+
+def test_async_write():
+    """Test that the asynchronous stream writes everything on flush"""
+    file_path = "test_async.txt"
+    stream = OutputStream(open(file_path, "w"), level="DEBUG",
+                          format="{message}", asynchronous=True)
+
+    for i in range(100):
+        stream.write(_record(str(i), 1))
+
+    stream.close()
+
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+
+    remove(file_path)
+
+    assert lines == [str(i) for i in range(100)], "Records should be in order"
+
+
+def test_async_writer_overflow():
+    """Test the drop policies of the writer"""
+    written = []
+    release = Event()
+
+    def emit(text):
+        release.wait()
+        written.append(text)
+
+    writer = AsyncWriter(emit, queue_size=2, overflow="drop_oldest")
+
+    # The first one is taken by the thread which is blocked
+    writer.put("0")
+    while writer._queue:
+        pass
+
+    for i in range(1, 5):
+        writer.put(str(i))
+
+    release.set()
+    writer.close()
+
+    assert writer.dropped == 2, "Two records should be dropped"
+    assert "".join(written) == "034", "Oldest records should be dropped"
+
+    with raises(InvalidOverflowPolicy):
+        AsyncWriter(emit, overflow="nana")
+
+
+def test_buffered_write():
+    """Test that the buffered stream writes on size and level"""
+    file_path = "test_buffered.txt"
+    stream = OutputStream(open(file_path, "w"), level="DEBUG",
+                          format="{message}", buffer_size=1024,
+                          flush_interval=60)
+
+    def read():
+        with open(file_path) as f:
+            return f.read()
+
+    stream.write(_record("first", 1))
+    assert read() == "", "Should still be in the buffer"
+
+    stream.write(_record("error", 3))
+    assert read() == "first\nerror\n", "Error should flush the buffer"
+
+    stream.write(_record("x" * 1024, 1))
+    assert len(read()) == 1037, "Full buffer should be written"
+
+    stream.close()
+    remove(file_path)
+
+
+def test_detached_buffered(tmp_path):
+    """Test that a removed buffered stream is not written on exit"""
+    logger = Logger("test_detached_buffered", propagate=False)
+    stream = OutputStream(open(str(tmp_path / "buffered.log"), "w"),
+                          format="{message}", buffer_size=4096)
+    logger.add_stream(stream, shared=False)
+    logger.remove_stream(stream)
+
+    assert stream not in _buffered_streams, "Should not be written on exit"
+
+    stream.flush()
+    stream.close()
+    _close_buffered_streams()
+
+
+def test_rotation(tmp_path):
+    """Test that the file is rotated on size and old files removed"""
+    file_path = str(tmp_path / "test.log")
+    stream = OutputStream(open(file_path, "a"), level="DEBUG",
+                          format="{message}", max_bytes=10,
+                          backup_count=2)
+
+    for i in range(5):
+        stream.write(_record(str(i) * 7, 1))
+
+    stream.close()
+
+    files = sorted(path.name for path in tmp_path.iterdir())
+    assert len(files) == 3, "Should keep two backups and the current file"
+
+    with open(file_path) as f:
+        assert f.read() == "4" * 7 + "\n", "Current file should be new"
+
+
+def test_buffered_rotation(tmp_path):
+    """Test that the flush timer waits for the writes to rotate"""
+    file_path = str(tmp_path / "test.log")
+    stream = OutputStream(open(file_path, "a"), level="DEBUG",
+                          format="{message}", buffer_size=1024,
+                          flush_interval=0.01, max_bytes=10)
+
+    stream.write(_record("1" * 7, 1))
+    stream.write(_record("2" * 7, 1))
+
+    with stream._write_lock:
+        timer = stream._flush_timer
+        timer.join(0.2)
+        assert timer.is_alive(), "Should wait for the write lock"
+
+    timer.join(1)
+    assert not timer.is_alive(), "Should flush once the lock is free"
+
+    stream.close()
+
+    with open(file_path) as f:
+        assert f.read() == "1" * 7 + "\n" + "2" * 7 + "\n", \
+            "Should write the whole buffer"
+
+
+def test_rotation_backups(tmp_path):
+    """Test that only the rotated files are taken as backups"""
+    file_path = str(tmp_path / "app")
+    unrelated = ["app.conf", "app.bak", "app.py", "app.20200101-000000x"]
+    for name in unrelated:
+        (tmp_path / name).write_text("keep")
+
+    rotated = ["app.20200101-000000.10", "app.20200101-000000.2.gz",
+               "app.20200101-000000", "app.20200102-000000"]
+    for name in rotated:
+        (tmp_path / name).write_text("old")
+
+    stream = OutputStream(open(file_path, "a"), level="DEBUG",
+                          format="{message}", max_bytes=10,
+                          backup_count=2)
+    assert [os.path.basename(backup) for backup in
+            stream._rotator._list_backups()] == [
+        "app.20200101-000000", "app.20200101-000000.2",
+        "app.20200101-000000.10", "app.20200102-000000"
+    ], "Should sort the backups by time and count"
+
+    for i in range(2):
+        stream.write(_record(str(i) * 7, 1))
+
+    stream.close()
+
+    names = set(path.name for path in tmp_path.iterdir())
+    assert names.issuperset(unrelated), "Should not remove other files"
+    assert "app.20200102-000000" in names, "Should keep the newest backups"
+    assert len(names) == len(unrelated) + 3, \
+        "Should keep two backups and the current file"
+
+
+def _append_lines(file_path, worker):
+    """Write long lines from a worker process"""
+    stream = OutputStream(open(file_path, "a"), format="{message}",
+                          atomic_append=True)
+
+    for _ in range(200):
+        stream.write(_record(str(worker) * 5000))
+
+
+def test_atomic_append(tmp_path):
+    """Test that lines from many processes never get mixed up"""
+    file_path = str(tmp_path / "atomic.log")
+    workers = [Process(target=_append_lines, args=(file_path, i))
+               for i in range(4)]
+
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with open(file_path) as f:
+        lines = f.read().splitlines()
+
+    assert len(lines) == 800, "All the lines should be written"
+    assert all(line == line[0] * 5000 for line in lines),\
+        "Lines should not be mixed"
+
+
+def test_sinks(tmp_path):
+    """Test writing to streams other than text files"""
+    text = StringIO()
+    OutputStream(text, format="{message}").write(_record("text"))
+    assert text.getvalue() == "text\n", "Should write str to text streams"
+
+    binary = BytesIO()
+    OutputStream(binary, format="{message}").write(_record("binary"))
+    assert binary.getvalue() == b"binary\n", \
+        "Should write bytes to binary streams"
+
+    path = str(tmp_path / "fd.log")
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+    OutputStream(fd, format="{message}").write(_record("fd"))
+    os.close(fd)
+    with open(path) as f:
+        assert f.read() == "fd\n", "Should write to raw fds"
+
+    reader, writer = socket.socketpair()
+    OutputStream(writer, format="{message}").write(_record("socket"))
+    assert reader.recv(100) == b"socket\n", "Should write to sockets"
+    reader.close()
+    writer.close()
+
+    with raises(InvalidStream):
+        OutputStream(object())
+
+
+def test_stream_identity(tmp_path):
+    """Test when two streams are considered equal"""
+    assert OutputStream(StringIO()) != OutputStream(StringIO()), \
+        "Unnamed streams should not be equal"
+
+    text = StringIO()
+    assert OutputStream(text) == OutputStream(text), \
+        "Streams of the same object should be equal"
+
+    path = str(tmp_path / "same.log")
+    first, second = open(path, "a"), open(path, "a")
+    assert OutputStream(first) == OutputStream(second), \
+        "Streams of the same file should be equal"
+    assert len({OutputStream(first), OutputStream(second)}) == 1, \
+        "Should have the same hash"
+    first.close()
+    second.close()
+
+
+def test_stats():
+    """Test the counters and the histograms of the stream"""
+    stream = OutputStream(StringIO(), level="INFO", format="{message}",
+                          timing=True)
+
+    stream.write(_record("written"))
+    stream.write(_record("filtered", 0))
+    stream.disabled = True
+    stream.write(_record("disabled"))
+
+    stats = stream.stats()
+    assert stats["accepted"] == 1, "Should count the written records"
+    assert stats["filtered"] == 1, "Should count the filtered records"
+    assert stats["disabled"] == 1, "Should count the disabled records"
+    assert stats["bytes_written"] == len("written\n"), "Should count bytes"
+    assert stats["format_ns"]["count"] == 1, "Should time the format"
+    assert stats["write_ns"]["count"] == 1, "Should time the write"
+
+    stream.reset_stats()
+    assert stream.stats()["accepted"] == 0, "Should reset the counters"
+    assert stream.stats()["write_ns"]["count"] == 0, \
+        "Should reset the histograms"
+
+    buffered = OutputStream(BytesIO(), level="INFO", format="{message}",
+                            buffer_size=4096)
+    buffered.write(_record("ünïcode"))
+    assert buffered.stats()["bytes_written"] == \
+        len("ünïcode\n".encode("utf-8")), "Should count encoded bytes"
+
+
+def test_colors():
+    """Test that the colors are only used for terminals"""
+    text = StringIO()
+    stream = OutputStream(text, format="%a{levelname}%")
+    stream.write(_record("nana"))
+    assert text.getvalue() == "INFO nana\n",\
+        "Should remove the colors if not a terminal"
+
+    stream.colors = True
+    stream.write(_record("nana"))
+    assert text.getvalue().splitlines()[1] != "INFO nana",\
+        "Should use the colors if asked to"
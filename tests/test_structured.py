@@ -0,0 +1,30 @@
+"""Test the structured streams of the logger."""
+
+from json import loads
+from os import remove
+
+from simber.logger import Logger
+from simber.structured import JSONOutputStream, _json_encoder
+
+
+def test_json_stream():
+    """Test that the JSON stream writes one object per line"""
+    file_path = "test_json.txt"
+    stream = JSONOutputStream(open(file_path, "w"), level="DEBUG",
+                              encoder=_json_encoder)
+
+    logger = Logger("test_json")
+    logger.add_stream(stream)
+    logger.info("nana", request_id=5, levelname="not used")
+    logger.remove_stream(stream)
+
+    with open(file_path) as f:
+        record = loads(f.readline())
+
+    remove(file_path)
+
+    assert record["levelname"] == "INFO", "Extra should not override"
+    assert record["logger"] == "test_json", "Logger name should be present"
+    assert record["funcname"] == "test_json_stream", "Caller should be found"
+    assert record["message"].strip() == "nana", "Message should be present"
+    assert record["request_id"] == 5, "Extra fields should be present"